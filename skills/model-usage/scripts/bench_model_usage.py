@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark the single-pass summary against the multi-pass helpers on a synthetic payload.
+
+Usage:
+    python bench_model_usage.py [--years 10] [--models 50] [--repeat 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from model_usage import (
+    aggregate_costs,
+    filter_by_days,
+    latest_day_cost,
+    parse_daily_entries,
+    pick_current_model,
+    summarize_entries,
+)
+
+
+def synthetic_daily(years: int, models: int, seed: int = 7) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    names = [f"model-{index:02d}" for index in range(models)]
+    start = date.today() - timedelta(days=365 * years)
+    daily: List[Dict[str, Any]] = []
+    for offset in range(365 * years):
+        breakdowns = [{"modelName": name, "cost": round(rng.random() * 5, 4)} for name in names]
+        daily.append(
+            {
+                "date": (start + timedelta(days=offset)).isoformat(),
+                "totalCost": sum(item["cost"] for item in breakdowns),
+                "modelsUsed": names,
+                "modelBreakdowns": breakdowns,
+            }
+        )
+    # Codexbar does not promise ordering; shuffle so the sort-based helpers do real work.
+    rng.shuffle(daily)
+    return daily
+
+
+def multi_pass(payload: Dict[str, Any], days: Optional[int]) -> Tuple[Any, ...]:
+    """The previous `--mode current` pipeline: filter, sort-and-pick, scan, sort-and-scan."""
+    entries = filter_by_days(parse_daily_entries(payload), days)
+    model, latest_date = pick_current_model(entries)
+    totals = aggregate_costs(entries)
+    return model, latest_date, totals.get(model), latest_day_cost(entries, model), len(entries)
+
+
+def single_pass(payload: Dict[str, Any], days: Optional[int]) -> Tuple[Any, ...]:
+    summary = summarize_entries(parse_daily_entries(payload), days)
+    model, latest_date = summary.current
+    return model, latest_date, summary.totals.get(model), summary.latest_day_cost(model), summary.row_count
+
+
+def best_of(
+    fn: Callable[[Dict[str, Any], Optional[int]], Tuple[Any, ...]],
+    payload: Dict[str, Any],
+    days: Optional[int],
+    repeat: int,
+) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(payload, days)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark model_usage aggregation paths.")
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--models", type=int, default=50)
+    parser.add_argument("--days", type=int, default=365, help="Window for the filtered scenario.")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    payload = {"provider": "codex", "daily": synthetic_daily(args.years, args.models)}
+    rows = len(payload["daily"])
+    print(f"Rows: {rows} daily, {rows * args.models} model breakdowns")
+    for days in (None, args.days):
+        if multi_pass(payload, days) != single_pass(payload, days):
+            print(f"Mismatch between single-pass and multi-pass results (days={days}).")
+            return 1
+        multi = best_of(multi_pass, payload, days, args.repeat)
+        single = best_of(single_pass, payload, days, args.repeat)
+        label = f"--days {days}" if days else "all rows"
+        print(f"\n[{label}]")
+        print(f"multi-pass:  {multi * 1000:8.1f} ms")
+        print(f"single-pass: {single * 1000:8.1f} ms")
+        print(f"speedup:     {multi / single:8.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Incremental reader for codexbar cost JSON.
+
+Pulls `daily[]` rows for one provider out of a (possibly huge) payload one row at a
+time. Rows belonging to other providers are skipped with a regex scanner and never
+decoded. A provider's `daily` array may appear before its `provider` key (codexbar
+sorts keys), so its raw text is spooled to a temp file until the object is identified.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import tempfile
+from typing import IO, Any, Dict, Iterator, Optional
+
+CHUNK_SIZE = 64 * 1024
+SPOOL_MAX_MEMORY = 1024 * 1024
+
+_WS_RE = re.compile(r"[ \t\n\r]*")
+_STRING_RE = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+_SCALAR_RE = re.compile(r"[^,\]}\s]+")
+_RUN_RE = re.compile(r'(?:[^"\[\]{}]+|"[^"\\]*(?:\\.[^"\\]*)*")*')
+
+
+class JsonStream:
+    """Minimal pull parser over a text stream, buffering only what the current token needs."""
+
+    def __init__(self, handle: IO[str]):
+        self._handle = handle
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self, size: int = CHUNK_SIZE) -> bool:
+        if self._eof:
+            return False
+        chunk = self._handle.read(size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos :] + chunk
+        self._pos = 0
+        return True
+
+    def _skip_ws(self) -> None:
+        while True:
+            self._pos = _WS_RE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf) or not self._fill():
+                return
+
+    def peek(self) -> str:
+        self._skip_ws()
+        return self._buf[self._pos] if self._pos < len(self._buf) else ""
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            found = self._buf[self._pos : self._pos + 20] or "end of input"
+            raise RuntimeError(f"Invalid JSON input: expected '{char}' near {found!r}.")
+        self._pos += 1
+
+    def consume(self, char: str) -> bool:
+        if self.peek() == char:
+            self._pos += 1
+            return True
+        return False
+
+    def read_value(self) -> Any:
+        """Decode the next value in full; meant for rows and small fields."""
+        self._skip_ws()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                # Grow geometrically so a large value is not re-decoded once per chunk.
+                if not self._fill(max(CHUNK_SIZE, len(self._buf))):
+                    raise RuntimeError("Invalid JSON input: truncated value.")
+                continue
+            if end >= len(self._buf) and self._fill():
+                # A number may continue past the buffered text.
+                continue
+            self._pos = end
+            return value
+
+    def skip_value(self, sink: Optional[IO[str]] = None) -> None:
+        """Advance past the next value without decoding it, copying its raw text to `sink`."""
+        char = self.peek()
+        if char == '"':
+            pattern = _STRING_RE
+        elif char and char not in "[{":
+            pattern = _SCALAR_RE
+        else:
+            pattern = None
+        if pattern is not None:
+            while True:
+                match = pattern.match(self._buf, self._pos)
+                if match is not None and (match.end() < len(self._buf) or self._eof):
+                    break
+                if not self._fill(max(CHUNK_SIZE, len(self._buf))):
+                    if match is None:
+                        raise RuntimeError("Invalid JSON input: truncated value.")
+                    break
+            start, self._pos = self._pos, match.end()
+            if sink is not None:
+                sink.write(self._buf[start : self._pos])
+            return
+
+        start = self._pos
+        depth = 0
+        while True:
+            # _RUN_RE swallows strings and non-bracket text in C; Python only sees brackets.
+            self._pos = _RUN_RE.match(self._buf, self._pos).end()
+            if self._pos >= len(self._buf) or self._buf[self._pos] == '"':
+                # Buffer ends mid-run or mid-string: flush what we have and read on.
+                if sink is not None:
+                    sink.write(self._buf[start : self._pos])
+                if not self._fill(max(CHUNK_SIZE, len(self._buf) - self._pos)):
+                    raise RuntimeError("Invalid JSON input: unexpected end of input.")
+                start = self._pos
+                continue
+            depth += 1 if self._buf[self._pos] in "[{" else -1
+            self._pos += 1
+            if depth == 0:
+                if sink is not None:
+                    sink.write(self._buf[start : self._pos])
+                return
+
+    def iter_array(self) -> Iterator[Any]:
+        self.expect("[")
+        if self.consume("]"):
+            return
+        while True:
+            yield self.read_value()
+            if self.consume("]"):
+                return
+            self.expect(",")
+
+
+def _iter_spooled_rows(spool: IO[str]) -> Iterator[Any]:
+    try:
+        spool.seek(0)
+        yield from JsonStream(spool).iter_array()
+    finally:
+        spool.close()
+
+
+def _read_provider_object(stream: JsonStream, provider: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Parse one provider object. Returns it with `daily` as a lazy row iterator, or None
+    when it belongs to another provider (its rows are then skipped undecoded).
+    """
+    stream.expect("{")
+    fields: Dict[str, Any] = {}
+    spool: Optional[IO[str]] = None
+    try:
+        if not stream.consume("}"):
+            while True:
+                key = stream.read_value()
+                stream.expect(":")
+                if key != "daily":
+                    fields[key] = stream.read_value()
+                elif provider is not None and "provider" in fields and fields["provider"] != provider:
+                    stream.skip_value()
+                else:
+                    if spool is not None:
+                        spool.close()
+                    spool = tempfile.SpooledTemporaryFile(
+                        max_size=SPOOL_MAX_MEMORY, mode="w+", encoding="utf-8"
+                    )
+                    stream.skip_value(sink=spool)
+                if stream.consume("}"):
+                    break
+                stream.expect(",")
+    except BaseException:
+        if spool is not None:
+            spool.close()
+        raise
+    if provider is not None and fields.get("provider") != provider:
+        if spool is not None:
+            spool.close()
+        return None
+    if spool is not None:
+        fields["daily"] = _iter_spooled_rows(spool)
+    return fields
+
+
+def stream_payload(handle: IO[str], provider: str) -> Dict[str, Any]:
+    """Streaming counterpart of model_usage.load_payload for a text handle."""
+    stream = JsonStream(handle)
+    first = stream.peek()
+    if first == "{":
+        entry = _read_provider_object(stream, None)
+        assert entry is not None
+        return entry
+    if first != "[":
+        raise RuntimeError("Unsupported JSON input format.")
+    stream.expect("[")
+    if not stream.consume("]"):
+        while True:
+            if stream.peek() == "{":
+                entry = _read_provider_object(stream, provider)
+                if entry is not None:
+                    return entry
+            else:
+                stream.skip_value()
+            if stream.consume("]"):
+                break
+            stream.expect(",")
+    raise RuntimeError(f"Provider '{provider}' not found in codexbar payload.")
@@ -10,23 +10,53 @@ from __future__ import annotations
 import argparse
 import json
 import os
+import shutil
 import subprocess
 import sys
-from dataclasses import dataclass
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import date, datetime, timedelta
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from json_stream import CHUNK_SIZE, stream_payload
+from payload_cache import DEFAULT_TTL, BlobWriter, PayloadCache, TeeReader
+from session_logs import PriceTable, read_session_logs
+from usage_columns import BUCKETS, UsageColumns
+from usage_daemon import DEFAULT_WATCH_INTERVAL, default_daemon_address, query_daemon, serve, source_fingerprint
+from usage_index import read_indexed_logs
+
+
+PROVIDERS = ("codex", "claude")
 
 
 def eprint(msg: str) -> None:
     print(msg, file=sys.stderr)
 
 
-def run_codexbar_cost(provider: str) -> List[Dict[str, Any]]:
+def run_codexbar_cost(
+    provider: str,
+    timeout: Optional[float] = None,
+    cache: Optional[PayloadCache] = None,
+) -> List[Dict[str, Any]]:
+    if cache is not None:
+        output = cache.read(provider)
+        if output is not None:
+            try:
+                payload = json.loads(output)
+            except ValueError:
+                payload = None
+            if isinstance(payload, list):
+                return payload
+            # A truncated or corrupt blob is a miss; fetch again.
+            cache.discard(provider)
     cmd = ["codexbar", "cost", "--format", "json", "--provider", provider]
     try:
-        output = subprocess.check_output(cmd, text=True)
+        output = subprocess.check_output(cmd, text=True, timeout=timeout)
     except FileNotFoundError:
         raise RuntimeError("codexbar not found on PATH. Install CodexBar CLI first.")
+    except subprocess.TimeoutExpired:
+        raise RuntimeError(f"codexbar cost --provider {provider} timed out after {timeout:g}s.")
     except subprocess.CalledProcessError as exc:
         raise RuntimeError(f"codexbar cost failed (exit {exc.returncode}).")
     try:
@@ -35,20 +65,131 @@ def run_codexbar_cost(provider: str) -> List[Dict[str, Any]]:
         raise RuntimeError(f"Failed to parse codexbar JSON output: {exc}")
     if not isinstance(payload, list):
         raise RuntimeError("Expected codexbar cost JSON array.")
+    if cache is not None:
+        cache.store(provider, output)
     return payload
 
 
-def load_payload(input_path: Optional[str], provider: str) -> Dict[str, Any]:
+def stream_codexbar_cost(
+    provider: str,
+    timeout: Optional[float] = None,
+    cache: Optional[PayloadCache] = None,
+) -> Dict[str, Any]:
+    """Like run_codexbar_cost, but parses stdout incrementally instead of buffering it."""
+    sink: Optional[BlobWriter] = None
+    if cache is not None:
+        cached = cache.open(provider)
+        if cached is not None:
+            try:
+                with cached:
+                    return stream_payload(cached, provider)
+            except (RuntimeError, OSError, ValueError):
+                # A truncated or corrupt blob is a miss; fetch again.
+                cache.discard(provider)
+        sink = cache.writer(provider)
+    try:
+        entry = _stream_codexbar_output(provider, timeout, sink)
+    except BaseException:
+        if sink is not None:
+            sink.discard()
+        raise
+    if sink is not None:
+        sink.commit()
+    return entry
+
+
+def _stream_codexbar_output(provider: str, timeout: Optional[float], sink: Optional[BlobWriter]) -> Dict[str, Any]:
+    cmd = ["codexbar", "cost", "--format", "json", "--provider", provider]
+    try:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True, encoding="utf-8")
+    except FileNotFoundError:
+        raise RuntimeError("codexbar not found on PATH. Install CodexBar CLI first.")
+    timed_out = threading.Event()
+
+    def kill() -> None:
+        # Killing codexbar closes its stdout, which unblocks the reader below.
+        timed_out.set()
+        proc.kill()
+
+    timer = threading.Timer(timeout, kill) if timeout else None
+    if timer is not None:
+        timer.start()
+    with proc:
+        assert proc.stdout is not None
+        stdout: Any = proc.stdout if sink is None else TeeReader(proc.stdout, sink)
+        parse_error: Optional[RuntimeError] = None
+        try:
+            entry = stream_payload(stdout, provider)
+        except RuntimeError as exc:
+            parse_error = exc
+        # Drain the rest so codexbar is not cut off by a closed pipe (and the cache gets it all).
+        while stdout.read(CHUNK_SIZE):
+            pass
+        returncode = proc.wait()
+    if timer is not None:
+        timer.cancel()
+    if timed_out.is_set():
+        raise RuntimeError(f"codexbar cost --provider {provider} timed out after {timeout:g}s.")
+    if returncode != 0:
+        raise RuntimeError(f"codexbar cost failed (exit {returncode}).")
+    if parse_error is not None:
+        raise RuntimeError(f"Failed to parse codexbar JSON output: {parse_error}")
+    return entry
+
+
+def resolve_source(source: str) -> str:
+    if source == "auto":
+        return "codexbar" if shutil.which("codexbar") else "logs"
+    return source
+
+
+def load_payload(
+    input_path: Optional[str],
+    provider: str,
+    source: str = "codexbar",
+    prices_path: Optional[str] = None,
+    use_index: bool = False,
+    index_path: Optional[str] = None,
+    reindex: bool = False,
+    stream: bool = False,
+    timeout: Optional[float] = None,
+    cache: Optional[PayloadCache] = None,
+    days: Optional[int] = None,
+) -> Dict[str, Any]:
+    if stream and input_path == "-":
+        return stream_payload(sys.stdin, provider)
+    if stream and input_path:
+        # `daily` rows are spooled while stream_payload runs, so the file can close
+        # before the lazy row iterator is consumed.
+        with open(input_path, "r", encoding="utf-8") as handle:
+            return stream_payload(handle, provider)
     if input_path:
-        if input_path == "-":
-            raw = sys.stdin.read()
-        else:
-            with open(input_path, "r", encoding="utf-8") as handle:
-                raw = handle.read()
-        data = json.loads(raw)
+        data = read_input_json(input_path)
+    elif resolve_source(source) == "logs":
+        prices = PriceTable.load(prices_path)
+        if use_index:
+            # The index can apply --days in SQL; other sources are filtered after loading.
+            cutoff = _day_cutoff(days)
+            since = cutoff.isoformat() if cutoff else None
+            return read_indexed_logs(provider, prices, index_path, rebuild=reindex, since=since)
+        return read_session_logs(provider, prices)
+    elif stream:
+        return stream_codexbar_cost(provider, timeout, cache)
+    else:
+        data = run_codexbar_cost(provider, timeout, cache)
+    return select_provider(data, provider)
+
+
+def read_input_json(input_path: str) -> Any:
+    if input_path == "-":
+        raw = sys.stdin.read()
     else:
-        data = run_codexbar_cost(provider)
+        with open(input_path, "r", encoding="utf-8") as handle:
+            raw = handle.read()
+    return json.loads(raw)
+
 
+def select_provider(data: Any, provider: str) -> Dict[str, Any]:
     if isinstance(data, dict):
         return data
 
@@ -76,6 +217,14 @@ def parse_daily_entries(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
     return [entry for entry in daily if isinstance(entry, dict)]
 
 
+def iter_daily_entries(payload: Dict[str, Any]) -> Iterable[Dict[str, Any]]:
+    """Rows from either a parsed payload or a streamed one whose `daily` is an iterator."""
+    daily = payload.get("daily")
+    if isinstance(daily, Iterator):
+        return daily
+    return parse_daily_entries(payload)
+
+
 def parse_date(value: str) -> Optional[date]:
     try:
         return datetime.strptime(value, "%Y-%m-%d").date()
@@ -175,6 +324,102 @@ def latest_day_cost(entries: List[Dict[str, Any]], model: str) -> Tuple[Optional
     return None, None
 
 
+@dataclass
+class UsageSummary:
+    """
+    Everything the reports need, built in one pass over the daily rows.
+
+    `totals` maps model -> cost, `latest` maps model -> (date, raw cost) from the most
+    recent row mentioning it, and `current` is the auto-picked (model, date). All of it
+    is sized by the number of models, not rows, so streamed input stays bounded.
+    """
+
+    totals: Dict[str, float] = field(default_factory=dict)
+    latest: Dict[str, Tuple[str, int, Optional[str], Any]] = field(default_factory=dict)
+    current: Tuple[Optional[str], Optional[str]] = (None, None)
+    row_count: int = 0
+
+    def latest_day_cost(self, model: str) -> Tuple[Optional[str], Optional[float]]:
+        found = self.latest.get(model)
+        if found is None:
+            return None, None
+        _, _, day, cost = found
+        return day, float(cost) if isinstance(cost, (int, float)) else None
+
+
+def _day_cutoff(days: Optional[int]) -> Optional[date]:
+    if not days:
+        return None
+    return date.today() - timedelta(days=days - 1)
+
+
+def _parse_day(value: str) -> Optional[date]:
+    if len(value) == 10:
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            pass
+    return parse_date(value)
+
+
+def summarize_entries(entries: Iterable[Any], days: Optional[int] = None) -> UsageSummary:
+    """
+    Single-pass equivalent of filter_by_days + aggregate_costs + pick_current_model +
+    latest_day_cost. Rows are visited once in input order; a later row with a date >= the
+    best seen so far wins, which matches the stable date sort the separate helpers use.
+    """
+    summary = UsageSummary()
+    cutoff = _day_cutoff(days)
+    current_key: Optional[str] = None
+    totals = summary.totals
+    latest = summary.latest
+    for entry in entries:
+        if type(entry) is not dict:
+            continue
+        day = entry.get("date")
+        if type(day) is not str:
+            day = None
+        if cutoff is not None:
+            parsed = _parse_day(day) if day else None
+            if not parsed or parsed < cutoff:
+                continue
+        summary.row_count += 1
+        row_no = summary.row_count
+        sort_key = day or ""
+
+        best_model: Optional[str] = None
+        best_cost = 0.0
+        breakdowns = entry.get("modelBreakdowns")
+        if type(breakdowns) is list and breakdowns:
+            for item in breakdowns:
+                if type(item) is not dict:
+                    continue
+                model = item.get("modelName")
+                cost = item.get("cost")
+                if type(model) is not str:
+                    continue
+                seen = latest.get(model)
+                # Only a model's first item in a row counts, as in latest_day_cost().
+                if seen is None or (seen[0] <= sort_key and seen[1] != row_no):
+                    latest[model] = (sort_key, row_no, day, cost)
+                if type(cost) is not float:
+                    if not isinstance(cost, (int, float)):
+                        continue
+                    cost = float(cost)
+                totals[model] = totals.get(model, 0.0) + cost
+                if best_model is None or cost > best_cost:
+                    best_model, best_cost = model, cost
+
+        if best_model is None:
+            models_used = entry.get("modelsUsed")
+            if type(models_used) is list and models_used and type(models_used[-1]) is str:
+                best_model = models_used[-1]
+        if best_model is not None and (current_key is None or sort_key >= current_key):
+            current_key = sort_key
+            summary.current = (best_model, day)
+    return summary
+
+
 def render_text_current(
     provider: str,
     model: str,
@@ -201,6 +446,39 @@ def render_text_all(provider: str, totals: Dict[str, float]) -> str:
     return "\n".join(lines)
 
 
+def render_text_timeseries(provider: str, bucket: str, window: int, series: List[Dict[str, Any]]) -> str:
+    lines = [f"Provider: {provider}", f"Cost per {bucket} ({window}-{bucket} moving average):"]
+    for model in series:
+        lines.append(f"- {model['model']}: {usd(model['totalCostUSD'])}")
+        for point in model["series"]:
+            lines.append(f"    {point['period']}  {usd(point['costUSD']):>12}  avg {usd(point['movingAvgUSD'])}")
+    return "\n".join(lines)
+
+
+def render_text_tokens(provider: str, totals: Dict[str, int], models: List[Dict[str, Any]]) -> str:
+    lines = [f"Provider: {provider}", "Tokens:"]
+    for name in ("inputTokens", "outputTokens", "cacheReadTokens", "cacheCreationTokens", "totalTokens"):
+        lines.append(f"- {name}: {totals[name]:,}")
+    if models:
+        lines.append("Models:")
+        for row in models:
+            lines.append(
+                f"- {row['model']}: in {row['inputTokens']:,} / out {row['outputTokens']:,} / "
+                f"cache read {row['cacheReadTokens']:,} / cache write {row['cacheCreationTokens']:,}"
+            )
+    return "\n".join(lines)
+
+
+def render_text_percentiles(provider: str, rows: List[Dict[str, Any]]) -> str:
+    lines = [f"Provider: {provider}", "Daily cost distribution:"]
+    for row in rows:
+        points = ", ".join(f"{name} {usd(value)}" for name, value in row["percentiles"].items())
+        lines.append(
+            f"- {row['model']}: {row['days']} days, mean {usd(row['meanUSD'])}, max {usd(row['maxUSD'])}; {points}"
+        )
+    return "\n".join(lines)
+
+
 def build_json_current(
     provider: str,
     model: str,
@@ -233,76 +511,434 @@ def build_json_all(provider: str, totals: Dict[str, float]) -> Dict[str, Any]:
     }
 
 
-def main() -> int:
-    parser = argparse.ArgumentParser(description="Summarize CodexBar model usage from local cost logs.")
-    parser.add_argument("--provider", choices=["codex", "claude"], default="codex")
-    parser.add_argument("--mode", choices=["current", "all"], default="current")
-    parser.add_argument("--model", help="Explicit model name to report instead of auto-current.")
-    parser.add_argument("--input", help="Path to codexbar cost JSON (or '-' for stdin).")
-    parser.add_argument("--days", type=int, help="Limit to last N days (based on daily rows).")
-    parser.add_argument("--format", choices=["text", "json"], default="text")
-    parser.add_argument("--pretty", action="store_true", help="Pretty-print JSON output.")
+def build_json_timeseries(provider: str, bucket: str, window: int, series: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {"provider": provider, "mode": "timeseries", "bucket": bucket, "window": window, "models": series}
 
-    args = parser.parse_args()
 
-    try:
-        payload = load_payload(args.input, args.provider)
-    except Exception as exc:
-        eprint(str(exc))
-        return 1
+def build_json_tokens(provider: str, totals: Dict[str, int], models: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {"provider": provider, "mode": "tokens", "totals": totals, "models": models}
+
+
+def build_json_percentiles(provider: str, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {"provider": provider, "mode": "percentiles", "models": rows}
 
-    entries = parse_daily_entries(payload)
-    entries = filter_by_days(entries, args.days)
 
-    if args.mode == "current":
-        model = args.model
+def build_report(
+    provider: str,
+    mode: str,
+    entries: Iterable[Any],
+    days: Optional[int] = None,
+    model: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    JSON report for --mode current/all. Raises LookupError when there is nothing to report.
+    Shared by the CLI and the --serve daemon so both emit the same shape.
+    """
+    summary = summarize_entries(entries, days)
+    if mode == "current":
         latest_date = None
         if not model:
-            model, latest_date = pick_current_model(entries)
+            model, latest_date = summary.current
         if not model:
-            eprint("No model data found in codexbar cost payload.")
-            return 2
-        totals = aggregate_costs(entries)
-        total_cost = totals.get(model)
-        latest_cost_date, latest_cost = latest_day_cost(entries, model)
+            raise LookupError("No model data found in codexbar cost payload.")
+        latest_cost_date, latest_cost = summary.latest_day_cost(model)
+        return build_json_current(
+            provider=provider,
+            model=model,
+            latest_date=latest_date,
+            total_cost=summary.totals.get(model),
+            latest_cost=latest_cost,
+            latest_cost_date=latest_cost_date,
+            entry_count=summary.row_count,
+        )
+    if not summary.totals:
+        raise LookupError("No model breakdowns found in codexbar cost payload.")
+    return build_json_all(provider=provider, totals=summary.totals)
+
+
+def provider_total_cost(report: Dict[str, Any]) -> float:
+    if report["mode"] == "current":
+        return report["totalCostUSD"] or 0.0
+    return sum(row["totalCostUSD"] for row in report["models"])
+
+
+def build_json_multi(mode: str, reports: List[Dict[str, Any]], errors: List[Tuple[str, str]]) -> Dict[str, Any]:
+    providers = []
+    for report in reports:
+        if mode == "all":
+            report = dict(report, totalCostUSD=provider_total_cost(report))
+        providers.append(report)
+    return {
+        "mode": mode,
+        "providers": providers,
+        "totalCostUSD": sum(provider_total_cost(report) for report in reports),
+        "errors": [{"provider": provider, "error": message} for provider, message in errors],
+    }
 
-        if args.format == "json":
-            payload_out = build_json_current(
-                provider=args.provider,
-                model=model,
-                latest_date=latest_date,
-                total_cost=total_cost,
-                latest_cost=latest_cost,
-                latest_cost_date=latest_cost_date,
-                entry_count=len(entries),
+
+def render_text_report(report: Dict[str, Any]) -> str:
+    if "providers" in report:
+        blocks = [render_text_report(item) for item in report["providers"]]
+        if report["mode"] == "all":
+            blocks = [
+                f"{block}\nTotal: {usd(item['totalCostUSD'])}" for block, item in zip(blocks, report["providers"])
+            ]
+        blocks.append(f"Total cost (all providers): {usd(report['totalCostUSD'])}")
+        return "\n\n".join(blocks)
+    if report["mode"] == "current":
+        return render_text_current(
+            provider=report["provider"],
+            model=report["model"],
+            latest_date=report["latestModelDate"],
+            total_cost=report["totalCostUSD"],
+            latest_cost=report["latestDayCostUSD"],
+            latest_cost_date=report["latestDayCostDate"],
+            entry_count=report["dailyRowCount"],
+        )
+    totals = {row["model"]: row["totalCostUSD"] for row in report["models"]}
+    return render_text_all(provider=report["provider"], totals=totals)
+
+
+def print_report(args: argparse.Namespace, report: Dict[str, Any]) -> None:
+    if args.format == "json":
+        indent = 2 if args.pretty else None
+        print(json.dumps(report, indent=indent, sort_keys=args.pretty))
+    else:
+        print(render_text_report(report))
+
+
+def collect_report(
+    args: argparse.Namespace,
+    provider: str,
+    input_data: Any = None,
+    cache: Optional[PayloadCache] = None,
+) -> Tuple[int, Any]:
+    """
+    current/all report for one provider: (0, report) on success, else (exit code, message)
+    with 1 for load failures and 2 for no data, matching main().
+    """
+    if use_daemon(args):
+        try:
+            report = query_daemon(
+                args.daemon or default_daemon_address(),
+                provider,
+                args.mode,
+                resolve_source(args.source),
+                args.days,
+                args.model,
             )
-            indent = 2 if args.pretty else None
-            print(json.dumps(payload_out, indent=indent, sort_keys=args.pretty))
+        except LookupError as exc:
+            return 2, str(exc)
+        if report is not None:
+            return 0, report
+    try:
+        if input_data is not None:
+            payload = select_provider(input_data, provider)
         else:
-            print(
-                render_text_current(
-                    provider=args.provider,
-                    model=model,
-                    latest_date=latest_date,
-                    total_cost=total_cost,
-                    latest_cost=latest_cost,
-                    latest_cost_date=latest_cost_date,
-                    entry_count=len(entries),
-                )
+            payload = load_payload(
+                args.input,
+                provider,
+                args.source,
+                args.prices,
+                use_index=args.index or args.reindex,
+                index_path=args.index_path,
+                reindex=args.reindex,
+                stream=args.stream,
+                timeout=args.timeout,
+                cache=cache,
+                days=args.days,
             )
-        return 0
+    except Exception as exc:
+        return 1, str(exc)
+    try:
+        report = build_report(provider, args.mode, iter_daily_entries(payload), args.days, args.model)
+    except LookupError as exc:
+        return 2, str(exc)
+    if cache is not None and cache.info(provider):
+        report["cache"] = cache.info(provider)
+    return 0, report
+
+
+def run_multi_provider_report(args: argparse.Namespace, cache: Optional[PayloadCache] = None) -> int:
+    """Fetch every provider concurrently; wall time is the slowest provider, not the sum."""
+    input_data = None
+    if args.input and not args.stream:
+        # One read serves every provider (and stdin can only be read once).
+        try:
+            input_data = read_input_json(args.input)
+        except Exception as exc:
+            eprint(str(exc))
+            return 1
+    with ThreadPoolExecutor(max_workers=len(args.providers)) as pool:
+        results = list(pool.map(lambda provider: collect_report(args, provider, input_data, cache), args.providers))
+
+    reports: List[Dict[str, Any]] = []
+    errors: List[Tuple[str, str]] = []
+    codes: List[int] = []
+    for provider, (code, result) in zip(args.providers, results):
+        if code:
+            eprint(f"{provider}: {result}")
+            errors.append((provider, result))
+            codes.append(code)
+        else:
+            reports.append(result)
+    if not reports:
+        return min(codes)
+    print_report(args, build_json_multi(args.mode, reports, errors))
+    return 0
 
-    totals = aggregate_costs(entries)
-    if not totals:
-        eprint("No model breakdowns found in codexbar cost payload.")
-        return 2
 
-    if args.format == "json":
-        payload_out = build_json_all(provider=args.provider, totals=totals)
-        indent = 2 if args.pretty else None
-        print(json.dumps(payload_out, indent=indent, sort_keys=args.pretty))
+def parse_quantiles(value: str) -> List[float]:
+    try:
+        quantiles = [float(part) for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid percentile list: {value}")
+    if not quantiles or any(q < 0 or q > 100 for q in quantiles):
+        raise argparse.ArgumentTypeError("Percentiles must be between 0 and 100.")
+    return quantiles
+
+
+def run_columnar_report(
+    args: argparse.Namespace,
+    payload: Dict[str, Any],
+    cache: Optional[PayloadCache] = None,
+) -> int:
+    """timeseries / tokens / percentiles modes, computed over UsageColumns."""
+    use_numpy = {"auto": None, "numpy": True, "python": False}[args.backend]
+    try:
+        columns = UsageColumns.from_entries(iter_daily_entries(payload), _day_cutoff(args.days), use_numpy)
+    except RuntimeError as exc:
+        eprint(str(exc))
+        return 1
+
+    if args.mode == "tokens":
+        totals = columns.token_totals()
+        models = columns.model_token_totals()
+        if args.model:
+            models = [row for row in models if row["model"] == args.model]
+        if args.format == "json":
+            payload_out = build_json_tokens(args.provider, totals, models)
+        else:
+            print(render_text_tokens(args.provider, totals, models))
+            return 0
     else:
-        print(render_text_all(provider=args.provider, totals=totals))
+        if not len(columns):
+            eprint("No model breakdowns found in codexbar cost payload.")
+            return 2
+        if args.mode == "timeseries":
+            rows = columns.timeseries(args.bucket, args.window)
+        else:
+            rows = columns.percentiles(args.percentiles)
+        if args.model:
+            rows = [row for row in rows if row["model"] == args.model]
+        if args.format == "text":
+            if args.mode == "timeseries":
+                print(render_text_timeseries(args.provider, args.bucket, args.window, rows))
+            else:
+                print(render_text_percentiles(args.provider, rows))
+            return 0
+        if args.mode == "timeseries":
+            payload_out = build_json_timeseries(args.provider, args.bucket, args.window, rows)
+        else:
+            payload_out = build_json_percentiles(args.provider, rows)
+
+    if cache is not None and cache.info(args.provider):
+        payload_out["cache"] = cache.info(args.provider)
+    indent = 2 if args.pretty else None
+    print(json.dumps(payload_out, indent=indent, sort_keys=args.pretty))
+    return 0
+
+
+def serve_usage(args: argparse.Namespace) -> int:
+    """--serve: keep parsed rows in memory and answer current/all queries until stopped."""
+    source = resolve_source(args.source)
+
+    def load(provider: str) -> List[Dict[str, Any]]:
+        payload = load_payload(
+            None,
+            provider,
+            args.source,
+            args.prices,
+            use_index=args.index,
+            index_path=args.index_path,
+        )
+        return list(iter_daily_entries(payload))
+
+    try:
+        return serve(
+            args.daemon or default_daemon_address(),
+            source,
+            load,
+            build_report,
+            source_fingerprint,
+            interval=args.watch_interval,
+            preload=tuple(args.providers),
+        )
+    except (OSError, RuntimeError) as exc:
+        eprint(str(exc))
+        return 1
+
+
+def use_daemon(args: argparse.Namespace) -> bool:
+    # Flags that change how data is loaded have to be honoured locally; the daemon's rows
+    # were loaded without them.
+    if args.no_daemon or args.input or args.reindex or args.prices:
+        return False
+    if args.refresh or args.no_cache or args.stream or args.timeout is not None:
+        return False
+    return args.mode in ("current", "all")
+
+
+def parse_providers(value: str) -> List[str]:
+    names = [part.strip() for part in value.split(",") if part.strip()]
+    if names == ["all"]:
+        return list(PROVIDERS)
+    if not names or any(name not in PROVIDERS for name in names):
+        raise argparse.ArgumentTypeError(
+            f"Invalid provider list: {value} (choose from {', '.join(PROVIDERS)}, or all)."
+        )
+    return list(dict.fromkeys(names))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Summarize CodexBar model usage from local cost logs.")
+    parser.add_argument(
+        "--provider",
+        dest="providers",
+        metavar="PROVIDER",
+        type=parse_providers,
+        default=["codex"],
+        help="codex, claude, a comma-separated list, or all. Several providers are fetched concurrently "
+        "and merged into one current/all report with per-provider and grand totals.",
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["current", "all", "timeseries", "tokens", "percentiles"],
+        default="current",
+    )
+    parser.add_argument("--model", help="Explicit model name to report instead of auto-current.")
+    parser.add_argument("--input", help="Path to codexbar cost JSON (or '-' for stdin).")
+    parser.add_argument(
+        "--source",
+        choices=["auto", "codexbar", "logs"],
+        default="auto",
+        help="Data source when --input is not given: codexbar CLI, local JSONL session logs, "
+        "or auto (codexbar if on PATH, else logs).",
+    )
+    parser.add_argument(
+        "--prices",
+        help="JSON price table (USD per 1M tokens, keyed by model prefix) overriding built-in prices for --source logs.",
+    )
+    parser.add_argument(
+        "--index",
+        action="store_true",
+        help="With --source logs, keep an incremental on-disk index and only parse newly appended log bytes.",
+    )
+    parser.add_argument("--index-path", help="Index file (default: ~/.cache/openclaw/model-usage/usage-index.sqlite).")
+    parser.add_argument("--reindex", action="store_true", help="Drop the index and rebuild it from scratch.")
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Parse codexbar JSON incrementally, pulling daily rows for --provider one at a time "
+        "(bounded memory for very large payloads).",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        help="Per-provider timeout in seconds for the codexbar subprocess.",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=DEFAULT_TTL,
+        help=f"Reuse cached codexbar output younger than this many seconds (default: {DEFAULT_TTL:g}).",
+    )
+    parser.add_argument("--cache-dir", help="Payload cache directory (default: ~/.cache/openclaw/model-usage/codexbar).")
+    parser.add_argument("--no-cache", action="store_true", help="Always run codexbar and leave the cache untouched.")
+    parser.add_argument("--refresh", action="store_true", help="Run codexbar and replace the cached output.")
+    parser.add_argument("--days", type=int, help="Limit to last N days (based on daily rows).")
+    parser.add_argument("--format", choices=["text", "json"], default="text")
+    parser.add_argument("--pretty", action="store_true", help="Pretty-print JSON output.")
+    parser.add_argument("--bucket", choices=BUCKETS, default="day", help="Period size for --mode timeseries.")
+    parser.add_argument("--window", type=int, default=7, help="Moving-average window in periods (--mode timeseries).")
+    parser.add_argument(
+        "--percentiles",
+        type=parse_quantiles,
+        default=[50.0, 90.0, 99.0],
+        help="Comma-separated daily-cost percentiles for --mode percentiles (default: 50,90,99).",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["auto", "numpy", "python"],
+        default="auto",
+        help="Analytics backend for timeseries/tokens/percentiles (auto uses NumPy when installed).",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Run a daemon that keeps usage in memory and answers current/all queries from other invocations.",
+    )
+    parser.add_argument(
+        "--daemon",
+        metavar="ADDRESS",
+        help="Daemon address: a Unix socket path or http://127.0.0.1:PORT "
+        "(default: ~/.cache/openclaw/model-usage/daemon.sock).",
+    )
+    parser.add_argument("--no-daemon", action="store_true", help="Always compute locally, even if a daemon is running.")
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        default=DEFAULT_WATCH_INTERVAL,
+        help="Seconds between source change checks in --serve mode.",
+    )
+
+    args = parser.parse_args()
+    args.provider = args.providers[0]
+    if len(args.providers) > 1 and args.mode not in ("current", "all"):
+        parser.error(f"--mode {args.mode} supports a single --provider.")
+    if len(args.providers) > 1 and args.stream and args.input == "-":
+        parser.error("--stream --input - reads stdin once; pass a file path to stream several providers.")
+
+    if args.serve and args.input:
+        parser.error("--serve answers queries from codexbar or session logs; it cannot serve --input.")
+    if args.serve:
+        return serve_usage(args)
+
+    cache = None
+    if not args.no_cache and not args.input and resolve_source(args.source) == "codexbar":
+        try:
+            cache = PayloadCache(args.cache_dir, args.cache_ttl, refresh=args.refresh)
+        except OSError as exc:
+            eprint(f"Payload cache disabled: {exc}")
+
+    if args.mode in ("timeseries", "tokens", "percentiles"):
+        try:
+            payload = load_payload(
+                args.input,
+                args.provider,
+                args.source,
+                args.prices,
+                use_index=args.index or args.reindex,
+                index_path=args.index_path,
+                reindex=args.reindex,
+                stream=args.stream,
+                timeout=args.timeout,
+                cache=cache,
+                days=args.days,
+            )
+        except Exception as exc:
+            eprint(str(exc))
+            return 1
+        return run_columnar_report(args, payload, cache)
+
+    if len(args.providers) > 1:
+        return run_multi_provider_report(args, cache)
+
+    code, result = collect_report(args, args.provider, cache=cache)
+    if code:
+        eprint(result)
+        return code
+    print_report(args, result)
     return 0
 
 
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+On-disk cache of raw `codexbar cost` output for model_usage.py.
+
+Payloads are stored content-addressed under blobs/<sha256>.json; refs/<provider>.json
+points at the latest blob and records when it was fetched. Both are written to a temp
+file and renamed into place, so concurrent runs never see a partial payload. A ref older
+than the TTL is a miss and codexbar runs again.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import IO, Any, Dict, Optional
+
+DEFAULT_TTL = 120.0
+# Unreferenced blobs younger than this (or the TTL, if longer) are kept: another run may
+# have just renamed its blob into place and not yet written the ref pointing at it. Temp
+# files that old were left by a run that was killed mid-write.
+PRUNE_GRACE = 300.0
+
+
+def default_cache_dir() -> Path:
+    cache_home = os.environ.get("XDG_CACHE_HOME")
+    base = Path(cache_home).expanduser() if cache_home else Path.home() / ".cache"
+    return base / "openclaw" / "model-usage" / "codexbar"
+
+
+def _atomic_write(path: Path, data: str) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            handle.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class BlobWriter:
+    """Temp file that hashes what is written and becomes a blob on commit()."""
+
+    def __init__(self, cache: "PayloadCache", provider: str):
+        self._cache = cache
+        self._provider = provider
+        self._hash = hashlib.sha256()
+        fd, self._tmp = tempfile.mkstemp(dir=cache.blobs, prefix=".tmp-")
+        self._handle = os.fdopen(fd, "w", encoding="utf-8")
+
+    def write(self, text: str) -> None:
+        self._handle.write(text)
+        self._hash.update(text.encode("utf-8"))
+
+    def commit(self) -> None:
+        self._handle.close()
+        digest = self._hash.hexdigest()
+        os.replace(self._tmp, self._cache.blobs / f"{digest}.json")
+        self._cache._set_ref(self._provider, digest)
+
+    def discard(self) -> None:
+        self._handle.close()
+        try:
+            os.unlink(self._tmp)
+        except OSError:
+            pass
+
+
+class TeeReader:
+    """Text reader that copies everything read from `handle` into `sink`."""
+
+    def __init__(self, handle: IO[str], sink: BlobWriter):
+        self._handle = handle
+        self._sink = sink
+
+    def read(self, size: int = -1) -> str:
+        chunk = self._handle.read(size)
+        if chunk:
+            self._sink.write(chunk)
+        return chunk
+
+
+class PayloadCache:
+    def __init__(self, root: Optional[Path] = None, ttl: float = DEFAULT_TTL, refresh: bool = False):
+        self.root = Path(root).expanduser() if root else default_cache_dir()
+        self.ttl = ttl
+        self.refresh = refresh
+        self.blobs = self.root / "blobs"
+        self.refs = self.root / "refs"
+        self.blobs.mkdir(parents=True, exist_ok=True)
+        self.refs.mkdir(parents=True, exist_ok=True)
+        self._info: Dict[str, Dict[str, Any]] = {}
+
+    def info(self, provider: str) -> Optional[Dict[str, Any]]:
+        """Outcome of the last lookup for `provider`: status (hit/miss/refresh), age, digest."""
+        return self._info.get(provider)
+
+    def open(self, provider: str) -> Optional[IO[str]]:
+        """Fresh cached payload for `provider`, or None (and the caller fetches and stores)."""
+        if self.refresh:
+            self._info[provider] = {"status": "refresh"}
+            return None
+        handle: Optional[IO[str]] = None
+        try:
+            ref = json.loads((self.refs / f"{provider}.json").read_text(encoding="utf-8"))
+            age = time.time() - float(ref["fetchedAt"])
+            if 0 <= age <= self.ttl:
+                handle = open(self.blobs / f"{ref['digest']}.json", "r", encoding="utf-8")
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        if handle is None:
+            self._info[provider] = {"status": "miss"}
+            return None
+        self._info[provider] = {"status": "hit", "ageSeconds": round(age, 3), "digest": ref["digest"]}
+        return handle
+
+    def read(self, provider: str) -> Optional[str]:
+        handle = self.open(provider)
+        if handle is None:
+            return None
+        with handle:
+            try:
+                return handle.read()
+            except (OSError, ValueError):
+                self.discard(provider)
+                return None
+
+    def discard(self, provider: str) -> None:
+        """Drop the ref to a cached payload that turned out unreadable; the caller fetches again."""
+        self._info[provider] = {"status": "miss"}
+        try:
+            (self.refs / f"{provider}.json").unlink()
+        except OSError:
+            pass
+
+    def writer(self, provider: str) -> BlobWriter:
+        return BlobWriter(self, provider)
+
+    def store(self, provider: str, text: str) -> None:
+        writer = self.writer(provider)
+        try:
+            writer.write(text)
+        except BaseException:
+            writer.discard()
+            raise
+        writer.commit()
+
+    def _set_ref(self, provider: str, digest: str) -> None:
+        ref = {"digest": digest, "fetchedAt": time.time()}
+        _atomic_write(self.refs / f"{provider}.json", json.dumps(ref))
+        self._info.setdefault(provider, {"status": "miss"}).update(ageSeconds=0.0, digest=digest)
+        self._prune()
+
+    def _prune(self) -> None:
+        """Drop blobs no ref points at any more and stray temp files, once past the grace period."""
+        cutoff = time.time() - max(self.ttl, PRUNE_GRACE)
+        live = set()
+        for ref_path in self.refs.glob("*.json"):
+            try:
+                live.add(json.loads(ref_path.read_text(encoding="utf-8"))["digest"])
+            except (OSError, ValueError, KeyError, TypeError):
+                continue
+        stale = [blob for blob in self.blobs.glob("*.json") if blob.stem not in live]
+        stale += [*self.blobs.glob(".tmp-*"), *self.refs.glob(".tmp-*")]
+        for path in stale:
+            try:
+                if path.stat().st_mtime >= cutoff:
+                    continue
+                path.unlink()
+            except OSError:
+                pass
@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+"""
+Read Codex / Claude JSONL session logs directly and build codexbar-style cost payloads.
+
+Logs are streamed line by line and rolled up per (day, model), so memory follows the
+number of distinct days and models rather than the size of the logs on disk.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+PROVIDERS = ("codex", "claude")
+
+# USD per 1M tokens. Keys are model ids or id prefixes; the longest matching prefix wins.
+DEFAULT_PRICES: Dict[str, Dict[str, float]] = {
+    "gpt-5": {"input": 1.25, "output": 10.0, "cacheRead": 0.125, "cacheCreation": 0.0},
+    "gpt-5-codex": {"input": 1.25, "output": 10.0, "cacheRead": 0.125, "cacheCreation": 0.0},
+    "gpt-5-mini": {"input": 0.25, "output": 2.0, "cacheRead": 0.025, "cacheCreation": 0.0},
+    "gpt-5-nano": {"input": 0.05, "output": 0.4, "cacheRead": 0.005, "cacheCreation": 0.0},
+    "gpt-4.1": {"input": 2.0, "output": 8.0, "cacheRead": 0.5, "cacheCreation": 0.0},
+    "o3": {"input": 2.0, "output": 8.0, "cacheRead": 0.5, "cacheCreation": 0.0},
+    "o4-mini": {"input": 1.1, "output": 4.4, "cacheRead": 0.275, "cacheCreation": 0.0},
+    "claude-opus-4": {"input": 15.0, "output": 75.0, "cacheRead": 1.5, "cacheCreation": 18.75},
+    "claude-opus-4-5": {"input": 5.0, "output": 25.0, "cacheRead": 0.5, "cacheCreation": 6.25},
+    "claude-sonnet-4": {"input": 3.0, "output": 15.0, "cacheRead": 0.3, "cacheCreation": 3.75},
+    "claude-3-7-sonnet": {"input": 3.0, "output": 15.0, "cacheRead": 0.3, "cacheCreation": 3.75},
+    "claude-3-5-sonnet": {"input": 3.0, "output": 15.0, "cacheRead": 0.3, "cacheCreation": 3.75},
+    "claude-haiku-4-5": {"input": 1.0, "output": 5.0, "cacheRead": 0.1, "cacheCreation": 1.25},
+    "claude-3-5-haiku": {"input": 0.8, "output": 4.0, "cacheRead": 0.08, "cacheCreation": 1.0},
+}
+
+# Cheap byte-level prefilters so lines that can never carry usage skip json.loads.
+_CODEX_MARKERS = (b'"token_count"', b'"turn_context"', b'"session_meta"')
+_CLAUDE_MARKER = b'"usage"'
+# Claude dedupe keys kept across files in a full scan. Duplicates come from streamed
+# chunks and resumed sessions, which sit close together, so recent keys are enough.
+SEEN_MAX_KEYS = 100_000
+
+
+class RecentKeys:
+    """Set of at most `limit` keys, forgetting the least recently seen first."""
+
+    def __init__(self, limit: int = SEEN_MAX_KEYS):
+        self.limit = limit
+        self._keys: "OrderedDict[str, None]" = OrderedDict()
+
+    def __contains__(self, key: object) -> bool:
+        if key in self._keys:
+            self._keys.move_to_end(key)  # type: ignore[arg-type]
+            return True
+        return False
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, key: str) -> None:
+        self._keys[key] = None
+        self._keys.move_to_end(key)
+        if len(self._keys) > self.limit:
+            self._keys.popitem(last=False)
+
+
+@dataclass
+class ModelPrice:
+    input: float
+    output: float
+    cache_read: float = 0.0
+    cache_creation: float = 0.0
+
+
+@dataclass
+class UsageEvent:
+    day: str
+    model: str
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_creation_tokens: int = 0
+
+
+class PriceTable:
+    """Per-model token prices with longest-prefix model matching."""
+
+    def __init__(self, prices: Dict[str, ModelPrice]):
+        self._prices = dict(prices)
+        self._prefixes = sorted(self._prices, key=len, reverse=True)
+        self._resolved: Dict[str, Optional[ModelPrice]] = {}
+
+    @classmethod
+    def from_mapping(cls, raw: Dict[str, Any]) -> "PriceTable":
+        prices: Dict[str, ModelPrice] = {}
+        for model, entry in raw.items():
+            if not isinstance(model, str) or not isinstance(entry, dict):
+                raise RuntimeError(f"Invalid price entry for {model!r}.")
+            try:
+                prices[model] = ModelPrice(
+                    input=float(entry.get("input", 0.0)),
+                    output=float(entry.get("output", 0.0)),
+                    cache_read=float(entry.get("cacheRead", 0.0)),
+                    cache_creation=float(entry.get("cacheCreation", 0.0)),
+                )
+            except (TypeError, ValueError):
+                raise RuntimeError(f"Invalid price entry for {model!r}.")
+        return cls(prices)
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "PriceTable":
+        """Built-in prices, optionally overridden/extended by a JSON file of the same shape."""
+        raw: Dict[str, Any] = dict(DEFAULT_PRICES)
+        if path:
+            try:
+                with open(os.path.expanduser(path), "r", encoding="utf-8") as handle:
+                    overrides = json.load(handle)
+            except (OSError, json.JSONDecodeError) as exc:
+                raise RuntimeError(f"Failed to load price table {path}: {exc}")
+            if not isinstance(overrides, dict):
+                raise RuntimeError("Price table must be a JSON object keyed by model.")
+            raw.update(overrides)
+        return cls.from_mapping(raw)
+
+    def fingerprint(self) -> str:
+        """Stable digest of the table; cached costs are invalid once this changes."""
+        canonical = json.dumps(
+            {model: [p.input, p.output, p.cache_read, p.cache_creation] for model, p in self._prices.items()},
+            sort_keys=True,
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+    def lookup(self, model: str) -> Optional[ModelPrice]:
+        if model in self._resolved:
+            return self._resolved[model]
+        name = model.split("/")[-1]
+        match: Optional[ModelPrice] = None
+        for prefix in self._prefixes:
+            if name.startswith(prefix):
+                match = self._prices[prefix]
+                break
+        self._resolved[model] = match
+        return match
+
+    def cost(self, event: UsageEvent) -> float:
+        price = self.lookup(event.model)
+        if price is None:
+            return 0.0
+        return (
+            event.input_tokens * price.input
+            + event.output_tokens * price.output
+            + event.cache_read_tokens * price.cache_read
+            + event.cache_creation_tokens * price.cache_creation
+        ) / 1_000_000
+
+
+def codex_log_roots() -> List[Path]:
+    codex_home = os.environ.get("CODEX_HOME")
+    base = Path(codex_home).expanduser() if codex_home else Path.home() / ".codex"
+    return [base / "sessions"]
+
+
+def claude_log_roots() -> List[Path]:
+    config_dir = os.environ.get("CLAUDE_CONFIG_DIR")
+    if config_dir:
+        return [Path(part).expanduser() / "projects" for part in config_dir.split(",") if part.strip()]
+    return [Path.home() / ".config" / "claude" / "projects", Path.home() / ".claude" / "projects"]
+
+
+def log_roots(provider: str) -> List[Path]:
+    if provider == "codex":
+        return codex_log_roots()
+    if provider == "claude":
+        return claude_log_roots()
+    raise RuntimeError(f"Unsupported provider for session logs: {provider}")
+
+
+def iter_log_files(provider: str, roots: Optional[Iterable[Path]] = None) -> Iterator[Path]:
+    seen: Set[Path] = set()
+    for root in roots if roots is not None else log_roots(provider):
+        if not root.is_dir():
+            continue
+        for path in sorted(root.rglob("*.jsonl")):
+            resolved = path.resolve()
+            if resolved in seen or not path.is_file():
+                continue
+            seen.add(resolved)
+            yield path
+
+
+def local_day(timestamp: Any) -> Optional[str]:
+    if not isinstance(timestamp, str) or not timestamp:
+        return None
+    try:
+        parsed = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone().date().isoformat()
+
+
+def _int(value: Any) -> int:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return 0
+    return int(value)
+
+
+class SessionLogReader:
+    """
+    Stream usage events out of one JSONL session log.
+
+    `offset` advances past every complete line consumed and `state` carries the
+    per-file context (current Codex model, running token totals), so a later reader
+    can resume exactly where this one stopped.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        path: Path,
+        offset: int = 0,
+        state: Optional[Dict[str, Any]] = None,
+        seen: Optional[Any] = None,
+    ):
+        if provider not in PROVIDERS:
+            raise RuntimeError(f"Unsupported provider for session logs: {provider}")
+        self.provider = provider
+        self.path = path
+        self.offset = offset
+        self.state: Dict[str, Any] = dict(state or {})
+        # Claude Code repeats the same assistant message across streamed chunks and
+        # resumed sessions; `seen` (anything with `in` and add()) dedupes on message id +
+        # request id.
+        self.seen = seen if seen is not None else RecentKeys()
+
+    def __iter__(self) -> Iterator[UsageEvent]:
+        parse = self._parse_codex if self.provider == "codex" else self._parse_claude
+        with open(self.path, "rb") as handle:
+            handle.seek(self.offset)
+            for line in handle:
+                complete = line.endswith(b"\n")
+                if not complete and not _is_json(line):
+                    # Partial line still being written; pick it up on the next pass.
+                    break
+                self.offset += len(line)
+                event = parse(line)
+                if event is not None:
+                    yield event
+
+    def _parse_codex(self, line: bytes) -> Optional[UsageEvent]:
+        if not any(marker in line for marker in _CODEX_MARKERS):
+            return None
+        obj = _loads(line)
+        if obj is None:
+            return None
+        payload = obj.get("payload")
+        if not isinstance(payload, dict):
+            return None
+        kind = obj.get("type")
+        if kind in ("turn_context", "session_meta"):
+            model = payload.get("model")
+            if isinstance(model, str) and model:
+                self.state["model"] = model
+            return None
+        if kind != "event_msg" or payload.get("type") != "token_count":
+            return None
+        info = payload.get("info")
+        if not isinstance(info, dict):
+            return None
+        usage = _codex_delta(info, self.state)
+        if usage is None:
+            return None
+        day = local_day(obj.get("timestamp"))
+        if day is None:
+            return None
+        input_tokens = _int(usage.get("input_tokens"))
+        cached = min(_int(usage.get("cached_input_tokens")), input_tokens)
+        return UsageEvent(
+            day=day,
+            model=self.state.get("model") or "unknown",
+            input_tokens=input_tokens - cached,
+            output_tokens=_int(usage.get("output_tokens")),
+            cache_read_tokens=cached,
+        )
+
+    def _parse_claude(self, line: bytes) -> Optional[UsageEvent]:
+        if _CLAUDE_MARKER not in line:
+            return None
+        obj = _loads(line)
+        if obj is None or obj.get("type") != "assistant":
+            return None
+        message = obj.get("message")
+        if not isinstance(message, dict):
+            return None
+        usage = message.get("usage")
+        model = message.get("model")
+        if not isinstance(usage, dict) or not isinstance(model, str) or model == "<synthetic>":
+            return None
+        message_id = message.get("id")
+        request_id = obj.get("requestId")
+        if isinstance(message_id, str) and isinstance(request_id, str):
+            key = f"{message_id}:{request_id}"
+            if key in self.seen:
+                return None
+            self.seen.add(key)
+        day = local_day(obj.get("timestamp"))
+        if day is None:
+            return None
+        return UsageEvent(
+            day=day,
+            model=model,
+            input_tokens=_int(usage.get("input_tokens")),
+            output_tokens=_int(usage.get("output_tokens")),
+            cache_read_tokens=_int(usage.get("cache_read_input_tokens")),
+            cache_creation_tokens=_int(usage.get("cache_creation_input_tokens")),
+        )
+
+
+_TOKEN_FIELDS = ("input_tokens", "cached_input_tokens", "output_tokens")
+
+
+def _codex_delta(info: Dict[str, Any], state: Dict[str, Any]) -> Optional[Dict[str, int]]:
+    """Usage for one token_count event, preferring running-total deltas over last_token_usage."""
+    total = info.get("total_token_usage")
+    last = info.get("last_token_usage")
+    if isinstance(total, dict):
+        current = {name: _int(total.get(name)) for name in _TOKEN_FIELDS}
+        previous = state.get("totals")
+        state["totals"] = current
+        if isinstance(previous, dict):
+            delta = {name: current[name] - _int(previous.get(name)) for name in _TOKEN_FIELDS}
+            if all(value == 0 for value in delta.values()):
+                # Repeated snapshot (e.g. rate-limit refresh); nothing new was billed.
+                return None
+            if all(value >= 0 for value in delta.values()):
+                return delta
+        elif not isinstance(last, dict):
+            return current
+    if isinstance(last, dict):
+        return {name: _int(last.get(name)) for name in _TOKEN_FIELDS}
+    return None
+
+
+def _loads(line: bytes) -> Optional[Dict[str, Any]]:
+    try:
+        obj = json.loads(line)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+    return obj if isinstance(obj, dict) else None
+
+
+def _is_json(line: bytes) -> bool:
+    return bool(line.strip()) and _loads(line) is not None
+
+
+@dataclass
+class DailyRollup:
+    """Per-day, per-model token and cost totals in codexbar's `daily[]` shape."""
+
+    prices: PriceTable
+    rows: Dict[Tuple[str, str], List[float]] = field(default_factory=dict)
+
+    def add(self, event: UsageEvent) -> None:
+        key = (event.day, event.model)
+        row = self.rows.get(key)
+        if row is None:
+            row = self.rows[key] = [0, 0, 0, 0, 0.0]
+        row[0] += event.input_tokens
+        row[1] += event.output_tokens
+        row[2] += event.cache_read_tokens
+        row[3] += event.cache_creation_tokens
+        row[4] += self.prices.cost(event)
+
+    def add_row(self, day: str, model: str, values: Iterable[float]) -> None:
+        row = self.rows.get((day, model))
+        if row is None:
+            row = self.rows[(day, model)] = [0, 0, 0, 0, 0.0]
+        for index, value in enumerate(values):
+            row[index] += value
+
+    def daily(self) -> List[Dict[str, Any]]:
+        by_day: Dict[str, List[Tuple[str, List[float]]]] = {}
+        for (day, model), row in self.rows.items():
+            by_day.setdefault(day, []).append((model, row))
+        daily: List[Dict[str, Any]] = []
+        for day in sorted(by_day):
+            models = sorted(by_day[day], key=lambda item: item[1][4], reverse=True)
+            input_tokens = sum(int(row[0]) for _, row in models)
+            output_tokens = sum(int(row[1]) for _, row in models)
+            cache_read = sum(int(row[2]) for _, row in models)
+            cache_creation = sum(int(row[3]) for _, row in models)
+            daily.append(
+                {
+                    "date": day,
+                    "inputTokens": input_tokens,
+                    "outputTokens": output_tokens,
+                    "cacheReadTokens": cache_read,
+                    "cacheCreationTokens": cache_creation,
+                    "totalTokens": input_tokens + output_tokens + cache_read + cache_creation,
+                    "totalCost": sum(row[4] for _, row in models),
+                    # Ascending by cost so the last entry is the dominant model, as in codexbar.
+                    "modelsUsed": [model for model, _ in reversed(models)],
+                    "modelBreakdowns": [
+                        {
+                            "modelName": model,
+                            "cost": row[4],
+                            "inputTokens": int(row[0]),
+                            "outputTokens": int(row[1]),
+                            "cacheReadTokens": int(row[2]),
+                            "cacheCreationTokens": int(row[3]),
+                        }
+                        for model, row in models
+                    ],
+                }
+            )
+        return daily
+
+
+def build_payload(provider: str, daily: List[Dict[str, Any]], source: str = "logs") -> Dict[str, Any]:
+    totals = {
+        "totalInputTokens": sum(entry["inputTokens"] for entry in daily),
+        "totalOutputTokens": sum(entry["outputTokens"] for entry in daily),
+        "cacheReadTokens": sum(entry["cacheReadTokens"] for entry in daily),
+        "cacheCreationTokens": sum(entry["cacheCreationTokens"] for entry in daily),
+        "totalTokens": sum(entry["totalTokens"] for entry in daily),
+        "totalCost": sum(entry["totalCost"] for entry in daily),
+    }
+    return {
+        "provider": provider,
+        "source": source,
+        "updatedAt": datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z"),
+        "daily": daily,
+        "totals": totals,
+    }
+
+
+def read_session_logs(
+    provider: str,
+    prices: Optional[PriceTable] = None,
+    roots: Optional[Iterable[Path]] = None,
+) -> Dict[str, Any]:
+    """Scan every session log for `provider` and return one codexbar-style provider entry."""
+    rollup = DailyRollup(prices or PriceTable.load())
+    seen = RecentKeys()
+    for path in iter_log_files(provider, roots):
+        try:
+            for event in SessionLogReader(provider, path, seen=seen):
+                rollup.add(event)
+        except OSError:
+            continue
+    return build_payload(provider, rollup.daily())
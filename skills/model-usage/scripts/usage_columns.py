@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Columnar view of codexbar daily rows for the timeseries / tokens / percentiles reports.
+
+Rows are flattened into typed columns (int32 day ordinals, interned int32 model ids,
+float64 costs, int64 token counts). With NumPy installed the reports run as vectorized
+group-bys over those columns; without it the same reports fall back to pure Python.
+NumPy is imported by the first UsageColumns, not by this module, so commands that never
+build columns do not pay for the import.
+"""
+
+from __future__ import annotations
+
+from array import array
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+np = None  # set by _load_numpy()
+
+BUCKETS = ("day", "week", "month")
+TOKEN_FIELDS = ("inputTokens", "outputTokens", "cacheReadTokens", "cacheCreationTokens")
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def _ordinal(value: Any) -> Optional[int]:
+    if type(value) is not str:
+        return None
+    try:
+        return date.fromisoformat(value).toordinal()
+    except ValueError:
+        pass
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").toordinal()
+    except ValueError:
+        return None
+
+
+def _count(value: Any) -> int:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return 0
+    return int(value)
+
+
+def _load_numpy() -> bool:
+    """Import NumPy into this module on first use; False when it is not installed."""
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:  # NumPy is optional; every report has a pure-Python path.
+            return False
+        np = numpy
+    return True
+
+
+def _percentile(values: List[float], q: float) -> float:
+    """Linear-interpolation percentile on sorted values (NumPy's default method)."""
+    rank = (len(values) - 1) * q / 100.0
+    low = int(rank)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+
+class UsageColumns:
+    """Typed columns for model breakdowns (one row per model per day) and daily token totals."""
+
+    def __init__(self, use_numpy: Optional[bool] = None):
+        have_numpy = use_numpy is not False and _load_numpy()
+        if use_numpy and not have_numpy:
+            raise RuntimeError("NumPy backend requested but numpy is not installed.")
+        self.use_numpy = have_numpy
+        self.model_names: List[str] = []
+        self._model_ids: Dict[str, int] = {}
+        self.day = array("i")
+        self.model = array("i")
+        self.cost = array("d")
+        self.model_tokens = {name: array("q") for name in TOKEN_FIELDS}
+        self.has_model_tokens = False
+        self.token_day = array("i")
+        self.day_tokens = {name: array("q") for name in TOKEN_FIELDS}
+
+    @classmethod
+    def from_entries(
+        cls,
+        entries: Iterable[Any],
+        cutoff: Optional[date] = None,
+        use_numpy: Optional[bool] = None,
+    ) -> "UsageColumns":
+        columns = cls(use_numpy)
+        min_ordinal = cutoff.toordinal() if cutoff else None
+        for entry in entries:
+            if type(entry) is dict:
+                columns.add_entry(entry, min_ordinal)
+        return columns
+
+    def _model_id(self, name: str) -> int:
+        model_id = self._model_ids.get(name)
+        if model_id is None:
+            model_id = self._model_ids[name] = len(self.model_names)
+            self.model_names.append(name)
+        return model_id
+
+    def add_entry(self, entry: Dict[str, Any], min_ordinal: Optional[int] = None) -> None:
+        ordinal = _ordinal(entry.get("date"))
+        if ordinal is None or (min_ordinal is not None and ordinal < min_ordinal):
+            return
+        self.token_day.append(ordinal)
+        for name in TOKEN_FIELDS:
+            self.day_tokens[name].append(_count(entry.get(name)))
+        breakdowns = entry.get("modelBreakdowns")
+        if type(breakdowns) is not list:
+            return
+        day_append = self.day.append
+        model_append = self.model.append
+        cost_append = self.cost.append
+        model_ids = self._model_ids
+        for item in breakdowns:
+            if type(item) is not dict:
+                continue
+            model = item.get("modelName")
+            cost = item.get("cost")
+            if type(model) is not str or not isinstance(cost, (int, float)):
+                continue
+            if not self.has_model_tokens and ("inputTokens" in item or "outputTokens" in item):
+                # First per-model token split seen: backfill zeros for earlier rows.
+                self.has_model_tokens = True
+                for name in TOKEN_FIELDS:
+                    self.model_tokens[name] = array("q", bytes(8 * len(self.cost)))
+            model_id = model_ids.get(model)
+            day_append(ordinal)
+            model_append(self._model_id(model) if model_id is None else model_id)
+            cost_append(float(cost))
+            if self.has_model_tokens:
+                for name in TOKEN_FIELDS:
+                    self.model_tokens[name].append(_count(item.get(name)))
+
+    def __len__(self) -> int:
+        return len(self.cost)
+
+    # -- bucketing -------------------------------------------------------------
+
+    def _bucket_keys(self, bucket: str) -> Sequence[int]:
+        """Bucket key per breakdown row: start-day ordinal for day/week, year*12+month-1 for month."""
+        if bucket not in BUCKETS:
+            raise RuntimeError(f"Unsupported bucket: {bucket}")
+        if self.use_numpy:
+            days = np.frombuffer(self.day, dtype=np.int32).astype(np.int64)
+            if bucket == "day":
+                return days
+            if bucket == "week":
+                # Ordinal 1 (0001-01-01) is a Monday.
+                return days - (days - 1) % 7
+            months = (days - _EPOCH_ORDINAL).astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+            return months + 1970 * 12
+        if bucket == "day":
+            return self.day
+        if bucket == "week":
+            return [ordinal - (ordinal - 1) % 7 for ordinal in self.day]
+        cache: Dict[int, int] = {}
+        keys = []
+        for ordinal in self.day:
+            key = cache.get(ordinal)
+            if key is None:
+                parsed = date.fromordinal(ordinal)
+                key = cache[ordinal] = parsed.year * 12 + parsed.month - 1
+            keys.append(key)
+        return keys
+
+    @staticmethod
+    def _bucket_label(bucket: str, key: int) -> str:
+        if bucket == "month":
+            return f"{key // 12:04d}-{key % 12 + 1:02d}"
+        return date.fromordinal(key).isoformat()
+
+    def _dense_costs(self, bucket: str) -> Tuple[List[str], Any]:
+        """(period labels, models x periods cost matrix) over a gap-free period range."""
+        keys = self._bucket_keys(bucket)
+        step = 7 if bucket == "week" else 1
+        n_models = len(self.model_names)
+        if self.use_numpy:
+            first, last = int(keys.min()), int(keys.max())
+            periods = (last - first) // step + 1
+            index = (keys - first) // step
+            model = np.frombuffer(self.model, dtype=np.int32).astype(np.int64)
+            cost = np.frombuffer(self.cost, dtype=np.float64)
+            matrix = np.bincount(model * periods + index, weights=cost, minlength=n_models * periods)
+            matrix = matrix.reshape(n_models, periods)
+        else:
+            first, last = min(keys), max(keys)
+            periods = (last - first) // step + 1
+            matrix = [[0.0] * periods for _ in range(n_models)]
+            for key, model_id, cost in zip(keys, self.model, self.cost):
+                matrix[model_id][(key - first) // step] += cost
+        labels = [self._bucket_label(bucket, first + offset * step) for offset in range(periods)]
+        return labels, matrix
+
+    # -- reports ---------------------------------------------------------------
+
+    def timeseries(self, bucket: str = "day", window: int = 7) -> List[Dict[str, Any]]:
+        """Per-model cost per period with a trailing `window`-period moving average."""
+        if not len(self):
+            return []
+        window = max(1, window)
+        labels, matrix = self._dense_costs(bucket)
+        periods = len(labels)
+        if self.use_numpy:
+            cumulative = np.cumsum(matrix, axis=1)
+            shifted = np.zeros_like(cumulative)
+            if window < periods:
+                shifted[:, window:] = cumulative[:, :-window]
+            counts = np.minimum(np.arange(1, periods + 1), window)
+            moving = ((cumulative - shifted) / counts).tolist()
+            rows = matrix.tolist()
+            totals = matrix.sum(axis=1).tolist()
+        else:
+            rows = matrix
+            moving = []
+            for row in rows:
+                averages, running = [], 0.0
+                for index, value in enumerate(row):
+                    running += value
+                    if index >= window:
+                        running -= row[index - window]
+                    averages.append(running / min(index + 1, window))
+                moving.append(averages)
+            totals = [sum(row) for row in rows]
+
+        series: List[Dict[str, Any]] = []
+        for model_id in sorted(range(len(rows)), key=lambda model_id: totals[model_id], reverse=True):
+            row = rows[model_id]
+            start = next((index for index, value in enumerate(row) if value), periods)
+            series.append(
+                {
+                    "model": self.model_names[model_id],
+                    "totalCostUSD": totals[model_id],
+                    "series": [
+                        {"period": labels[index], "costUSD": row[index], "movingAvgUSD": moving[model_id][index]}
+                        for index in range(start, periods)
+                    ],
+                }
+            )
+        return series
+
+    def token_totals(self) -> Dict[str, int]:
+        if self.use_numpy:
+            totals = {name: int(np.frombuffer(self.day_tokens[name], dtype=np.int64).sum()) for name in TOKEN_FIELDS}
+        else:
+            totals = {name: sum(self.day_tokens[name]) for name in TOKEN_FIELDS}
+        totals["totalTokens"] = sum(totals[name] for name in TOKEN_FIELDS)
+        return totals
+
+    def model_token_totals(self) -> List[Dict[str, Any]]:
+        """Per-model token splits; empty when the source only has day-level token counts."""
+        if not self.has_model_tokens:
+            return []
+        n_models = len(self.model_names)
+        if self.use_numpy:
+            model = np.frombuffer(self.model, dtype=np.int32)
+            sums = {
+                name: np.bincount(
+                    model, weights=np.frombuffer(self.model_tokens[name], dtype=np.int64), minlength=n_models
+                ).tolist()
+                for name in TOKEN_FIELDS
+            }
+        else:
+            sums = {name: [0] * n_models for name in TOKEN_FIELDS}
+            for name in TOKEN_FIELDS:
+                column = sums[name]
+                for model_id, value in zip(self.model, self.model_tokens[name]):
+                    column[model_id] += value
+        rows = []
+        for model_id, model in enumerate(self.model_names):
+            row: Dict[str, Any] = {"model": model}
+            for name in TOKEN_FIELDS:
+                row[name] = int(sums[name][model_id])
+            row["totalTokens"] = sum(row[name] for name in TOKEN_FIELDS)
+            rows.append(row)
+        rows.sort(key=lambda row: row["totalTokens"], reverse=True)
+        return rows
+
+    def percentiles(self, quantiles: Sequence[float]) -> List[Dict[str, Any]]:
+        """Distribution of each model's daily cost over the days it was used."""
+        if not len(self):
+            return []
+        results: List[Dict[str, Any]] = []
+        if self.use_numpy:
+            days = np.frombuffer(self.day, dtype=np.int32).astype(np.int64)
+            model = np.frombuffer(self.model, dtype=np.int32).astype(np.int64)
+            cost = np.frombuffer(self.cost, dtype=np.float64)
+            first = int(days.min())
+            span = int(days.max()) - first + 1
+            keys, inverse = np.unique(model * span + (days - first), return_inverse=True)
+            daily = np.bincount(inverse, weights=cost)
+            owners = keys // span
+            bounds = np.flatnonzero(np.diff(owners)) + 1
+            for group in np.split(np.arange(len(keys)), bounds):
+                values = daily[group]
+                points = np.percentile(values, quantiles).tolist()
+                results.append(
+                    self._percentile_row(
+                        int(owners[group[0]]), len(values), float(values.sum()), float(values.max()), quantiles, points
+                    )
+                )
+        else:
+            per_day: Dict[Tuple[int, int], float] = {}
+            for ordinal, model_id, cost in zip(self.day, self.model, self.cost):
+                key = (model_id, ordinal)
+                per_day[key] = per_day.get(key, 0.0) + cost
+            grouped: Dict[int, List[float]] = {}
+            for (model_id, _), value in per_day.items():
+                grouped.setdefault(model_id, []).append(value)
+            for model_id, values in grouped.items():
+                values.sort()
+                points = [_percentile(values, q) for q in quantiles]
+                results.append(self._percentile_row(model_id, len(values), sum(values), values[-1], quantiles, points))
+        results.sort(key=lambda row: row["totalCostUSD"], reverse=True)
+        return results
+
+    def _percentile_row(
+        self,
+        model_id: int,
+        days: int,
+        total: float,
+        maximum: float,
+        quantiles: Sequence[float],
+        points: Sequence[float],
+    ) -> Dict[str, Any]:
+        return {
+            "model": self.model_names[model_id],
+            "days": days,
+            "totalCostUSD": total,
+            "meanUSD": total / days,
+            "maxUSD": maximum,
+            "percentiles": {f"p{q:g}": value for q, value in zip(quantiles, points)},
+        }
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Long-running model_usage query daemon and its thin client.
+
+`model_usage.py --serve` keeps each provider's daily rows in memory, polls the source
+(codexbar's / the session logs' files, or the --input file) for changes, and answers
+`current` / `all` queries over a Unix socket or localhost HTTP with the same JSON that
+build_json_current() / build_json_all() produce. Answers are cached per query until the
+source changes, so repeat queries are a dictionary lookup.
+"""
+
+from __future__ import annotations
+
+import http.client
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlparse
+
+from session_logs import iter_log_files
+
+DEFAULT_WATCH_INTERVAL = 5.0
+CLIENT_TIMEOUT = 2.0
+MAX_CACHED_QUERIES = 256
+
+Loader = Callable[[str], List[Dict[str, Any]]]
+Reporter = Callable[[str, str, List[Dict[str, Any]], Optional[int], Optional[str]], Dict[str, Any]]
+Fingerprint = Callable[[str], Any]
+
+
+def default_daemon_address() -> str:
+    cache_home = os.environ.get("XDG_CACHE_HOME")
+    base = Path(cache_home).expanduser() if cache_home else Path.home() / ".cache"
+    return str(base / "openclaw" / "model-usage" / "daemon.sock")
+
+
+def source_fingerprint(provider: str) -> Tuple[Any, ...]:
+    """Cheap change detector: stat of every session log for `provider`."""
+    count = size = latest = 0
+    for path in iter_log_files(provider):
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        count += 1
+        size += st.st_size
+        latest = max(latest, st.st_mtime_ns)
+    return (count, size, latest)
+
+
+class _ProviderState:
+    def __init__(self, rows: List[Dict[str, Any]], fingerprint: Any):
+        self.rows = rows
+        self.fingerprint = fingerprint
+
+
+class UsageDaemon:
+    def __init__(self, source: str, load: Loader, report: Reporter, fingerprint: Fingerprint):
+        self.source = source
+        self._load = load
+        self._report = report
+        self._fingerprint = fingerprint
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._providers: Dict[str, _ProviderState] = {}
+        self._cache: Dict[Tuple[Any, ...], Tuple[int, bytes]] = {}
+
+    def _state(self, provider: str) -> _ProviderState:
+        state = self._providers.get(provider)
+        if state is not None:
+            return state
+        with self._lock:
+            load_lock = self._load_locks.setdefault(provider, threading.Lock())
+        with load_lock:
+            state = self._providers.get(provider)
+            if state is None:
+                fingerprint = self._fingerprint(provider)
+                state = _ProviderState(self._load(provider), fingerprint)
+                with self._lock:
+                    self._providers[provider] = state
+        return state
+
+    def query(self, provider: str, mode: str, days: Optional[int], model: Optional[str]) -> Tuple[int, bytes]:
+        # --days windows end today, so a cached answer expires at midnight.
+        key = (provider, mode, days, model, date.today() if days else None)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        state = None
+        try:
+            state = self._state(provider)
+            status, body = 200, self._report(provider, mode, state.rows, days, model)
+        except LookupError as exc:
+            status, body = 404, {"error": str(exc.args[0] if exc.args else exc)}
+        except Exception as exc:
+            # Source failures (codexbar missing, bad JSON) are not cached; retry next query.
+            return 502, json.dumps({"error": str(exc)}).encode("utf-8")
+        result = (status, json.dumps(body).encode("utf-8"))
+        with self._lock:
+            # refresh_changed() may have swapped in fresher rows while this report was being
+            # built; an answer from the old rows is returned once but not cached.
+            if state is None or self._providers.get(provider) is not state:
+                return result
+            if len(self._cache) >= MAX_CACHED_QUERIES:
+                self._cache.clear()
+            self._cache[key] = result
+        return result
+
+    def refresh_changed(self) -> None:
+        for provider, state in list(self._providers.items()):
+            try:
+                fingerprint = self._fingerprint(provider)
+                if fingerprint == state.fingerprint:
+                    continue
+                fresh = _ProviderState(self._load(provider), fingerprint)
+            except Exception as exc:
+                print(f"[model-usage] refresh failed for {provider}: {exc}", file=sys.stderr)
+                continue
+            with self._lock:
+                self._providers[provider] = fresh
+                self._cache = {key: value for key, value in self._cache.items() if key[0] != provider}
+
+    def watch(self, interval: float, stop: threading.Event) -> None:
+        while not stop.wait(interval):
+            self.refresh_changed()
+
+
+def _make_handler(daemon: UsageDaemon) -> type:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self) -> None:
+            url = urlparse(self.path)
+            if url.path == "/health":
+                self._send(200, json.dumps({"ok": True, "source": daemon.source, "pid": os.getpid()}).encode("utf-8"))
+                return
+            if url.path != "/v1/usage":
+                self._send(404, b'{"error": "not found"}')
+                return
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            # Clients send their resolved source; only an exact match may be answered.
+            if params.get("source") != daemon.source:
+                self._send(409, json.dumps({"error": f"daemon serves source '{daemon.source}'"}).encode("utf-8"))
+                return
+            mode = params.get("mode", "current")
+            if mode not in ("current", "all"):
+                self._send(400, b'{"error": "mode must be current or all"}')
+                return
+            try:
+                days = int(params["days"]) if params.get("days") else None
+            except ValueError:
+                self._send(400, b'{"error": "days must be an integer"}')
+                return
+            status, body = daemon.query(params.get("provider", "codex"), mode, days, params.get("model") or None)
+            self._send(status, body)
+
+        def _send(self, status: int, body: bytes) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    return Handler
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def _bind(address: str, handler: type) -> socketserver.BaseServer:
+    url = urlparse(address)
+    if url.scheme == "http":
+        host = url.hostname or "127.0.0.1"
+        if host not in ("127.0.0.1", "localhost", "::1"):
+            raise RuntimeError("The usage daemon only listens on localhost.")
+        server = ThreadingHTTPServer((host, url.port or 8765), handler)
+        server.daemon_threads = True
+        return server
+    if not hasattr(socket, "AF_UNIX"):
+        raise RuntimeError("Unix sockets are not supported here; use --daemon http://127.0.0.1:<port>.")
+    path = Path(address).expanduser()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        if _unix_socket_alive(str(path)):
+            raise RuntimeError(f"A usage daemon is already listening on {path}.")
+        path.unlink()
+    server = _UnixHTTPServer(str(path), handler)
+    os.chmod(path, 0o600)
+    return server
+
+
+def _unix_socket_alive(path: str) -> bool:
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.settimeout(CLIENT_TIMEOUT)
+        probe.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+
+def serve(
+    address: str,
+    source: str,
+    load: Loader,
+    report: Reporter,
+    fingerprint: Fingerprint,
+    interval: float = DEFAULT_WATCH_INTERVAL,
+    preload: Tuple[str, ...] = (),
+) -> int:
+    daemon = UsageDaemon(source, load, report, fingerprint)
+    for provider in preload:
+        daemon.query(provider, "current", None, None)
+    server = _bind(address, _make_handler(daemon))
+    stop = threading.Event()
+    watcher = threading.Thread(target=daemon.watch, args=(interval, stop), daemon=True)
+    watcher.start()
+
+    def _shutdown(*_: Any) -> None:
+        stop.set()
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, _shutdown)
+    print(f"[model-usage] serving {source} usage on {address}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+        if not urlparse(address).scheme:
+            try:
+                Path(address).expanduser().unlink()
+            except OSError:
+                pass
+    return 0
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self._path = path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self._path)
+
+
+def query_daemon(
+    address: str,
+    provider: str,
+    mode: str,
+    source: str,
+    days: Optional[int] = None,
+    model: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Ask a running daemon for a report. Returns None when no compatible daemon answers
+    (caller computes locally); raises LookupError when the daemon reports no data.
+    """
+    url = urlparse(address)
+    if url.scheme == "http":
+        conn: http.client.HTTPConnection = http.client.HTTPConnection(
+            url.hostname or "127.0.0.1", url.port or 8765, timeout=CLIENT_TIMEOUT
+        )
+    else:
+        path = os.path.expanduser(address)
+        if not hasattr(socket, "AF_UNIX") or not os.path.exists(path):
+            return None
+        conn = _UnixHTTPConnection(path, CLIENT_TIMEOUT)
+    params = {"provider": provider, "mode": mode, "source": source}
+    if days:
+        params["days"] = str(days)
+    if model:
+        params["model"] = model
+    try:
+        conn.request("GET", f"/v1/usage?{urlencode(params)}")
+        response = conn.getresponse()
+        body = json.loads(response.read().decode("utf-8"))
+    except (OSError, http.client.HTTPException, ValueError):
+        return None
+    finally:
+        conn.close()
+    if response.status == 200 and isinstance(body, dict):
+        return body
+    if response.status == 404 and isinstance(body, dict) and "error" in body:
+        raise LookupError(body["error"])
+    return None
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Incremental SQLite index of session-log usage for model_usage.py.
+
+Each log file is checkpointed by byte offset, inode and mtime, and its usage is kept as
+per-day, per-model rollups. A refresh only parses bytes appended since the last run;
+truncated, replaced or deleted files have their rollups dropped and are reindexed.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from session_logs import DailyRollup, PriceTable, SessionLogReader, build_payload, iter_log_files
+
+SCHEMA_VERSION = "1"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    provider TEXT NOT NULL,
+    device INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    state TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rollups (
+    path TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    day TEXT NOT NULL,
+    model TEXT NOT NULL,
+    input_tokens INTEGER NOT NULL,
+    output_tokens INTEGER NOT NULL,
+    cache_read_tokens INTEGER NOT NULL,
+    cache_creation_tokens INTEGER NOT NULL,
+    cost REAL NOT NULL,
+    PRIMARY KEY (path, day, model)
+);
+CREATE INDEX IF NOT EXISTS rollups_provider_day ON rollups (provider, day);
+CREATE TABLE IF NOT EXISTS seen (
+    key TEXT PRIMARY KEY,
+    path TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS seen_path ON seen (path);
+"""
+
+
+def default_index_path() -> Path:
+    cache_home = os.environ.get("XDG_CACHE_HOME")
+    base = Path(cache_home).expanduser() if cache_home else Path.home() / ".cache"
+    return base / "openclaw" / "model-usage" / "usage-index.sqlite"
+
+
+class _SeenKeys:
+    """Set-like view over the `seen` table so Claude dedupe spans runs without loading every key."""
+
+    def __init__(self, conn: sqlite3.Connection, path: str):
+        self._conn = conn
+        self._path = path
+
+    def __contains__(self, key: object) -> bool:
+        row = self._conn.execute("SELECT 1 FROM seen WHERE key = ?", (key,)).fetchone()
+        return row is not None
+
+    def add(self, key: str) -> None:
+        self._conn.execute("INSERT OR IGNORE INTO seen (key, path) VALUES (?, ?)", (key, self._path))
+
+
+class UsageIndex:
+    def __init__(self, path: Optional[Path] = None, prices: Optional[PriceTable] = None):
+        self.path = Path(path).expanduser() if path else default_index_path()
+        self.prices = prices or PriceTable.load()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.executescript(SCHEMA)
+        self._check_meta()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "UsageIndex":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def _check_meta(self) -> None:
+        expected = {"schema": SCHEMA_VERSION, "prices": self.prices.fingerprint()}
+        stored = dict(self.conn.execute("SELECT key, value FROM meta").fetchall())
+        if all(stored.get(key) == value for key, value in expected.items()):
+            return
+        # Costs are baked into the rollups, so a new price table means a full reindex.
+        with self.conn:
+            self.conn.execute("DELETE FROM files")
+            self.conn.execute("DELETE FROM rollups")
+            self.conn.execute("DELETE FROM seen")
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                expected.items(),
+            )
+
+    def reset(self) -> None:
+        with self.conn:
+            self.conn.execute("DELETE FROM files")
+            self.conn.execute("DELETE FROM rollups")
+            self.conn.execute("DELETE FROM seen")
+
+    def _drop_file(self, path: str) -> None:
+        self.conn.execute("DELETE FROM files WHERE path = ?", (path,))
+        self.conn.execute("DELETE FROM rollups WHERE path = ?", (path,))
+        self.conn.execute("DELETE FROM seen WHERE path = ?", (path,))
+
+    def refresh(self, provider: str, roots: Optional[Iterable[Path]] = None) -> Dict[str, int]:
+        """Bring the index up to date with the logs on disk; returns file/byte counters."""
+        known = {
+            row[0]: row[1:]
+            for row in self.conn.execute(
+                "SELECT path, device, inode, size, mtime_ns, offset, state FROM files WHERE provider = ?",
+                (provider,),
+            )
+        }
+        stats = {"files": 0, "parsed": 0, "reindexed": 0, "removed": 0, "bytes": 0}
+        for file_path in iter_log_files(provider, roots):
+            key = str(file_path)
+            try:
+                st = file_path.stat()
+            except OSError:
+                continue
+            stats["files"] += 1
+            previous = known.pop(key, None)
+            offset, state = 0, {}
+            if previous is not None:
+                device, inode, size, mtime_ns, offset, state_raw = previous
+                if (device, inode) != (st.st_dev, st.st_ino) or st.st_size < offset:
+                    # Rotated or truncated: previous rollups no longer describe this file.
+                    with self.conn:
+                        self._drop_file(key)
+                    stats["reindexed"] += 1
+                    offset, state = 0, {}
+                elif st.st_size == size and st.st_mtime_ns == mtime_ns:
+                    continue
+                else:
+                    state = json.loads(state_raw)
+            self._ingest(provider, file_path, st, offset, state, stats)
+        for stale in known:
+            with self.conn:
+                self._drop_file(stale)
+            stats["removed"] += 1
+        return stats
+
+    def _ingest(
+        self,
+        provider: str,
+        file_path: Path,
+        st: os.stat_result,
+        offset: int,
+        state: Dict[str, Any],
+        stats: Dict[str, int],
+    ) -> None:
+        key = str(file_path)
+        rollup = DailyRollup(self.prices)
+        reader = SessionLogReader(provider, file_path, offset, state, seen=_SeenKeys(self.conn, key))
+        try:
+            with self.conn:
+                for event in reader:
+                    rollup.add(event)
+                self._commit_file(provider, file_path, st, reader, rollup)
+        except OSError:
+            # Unreadable right now; the rollback keeps the old checkpoint for the next refresh.
+            return
+        stats["parsed"] += 1
+        stats["bytes"] += reader.offset - offset
+
+    def _commit_file(
+        self,
+        provider: str,
+        file_path: Path,
+        st: os.stat_result,
+        reader: SessionLogReader,
+        rollup: DailyRollup,
+    ) -> None:
+        key = str(file_path)
+        self.conn.executemany(
+            """
+            INSERT INTO rollups (
+                path, provider, day, model,
+                input_tokens, output_tokens, cache_read_tokens, cache_creation_tokens, cost
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (path, day, model) DO UPDATE SET
+                input_tokens = input_tokens + excluded.input_tokens,
+                output_tokens = output_tokens + excluded.output_tokens,
+                cache_read_tokens = cache_read_tokens + excluded.cache_read_tokens,
+                cache_creation_tokens = cache_creation_tokens + excluded.cache_creation_tokens,
+                cost = cost + excluded.cost
+            """,
+            [(key, provider, day, model, *row) for (day, model), row in rollup.rows.items()],
+        )
+        self.conn.execute(
+            """
+            INSERT OR REPLACE INTO files (path, provider, device, inode, size, mtime_ns, offset, state)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (key, provider, st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, reader.offset, json.dumps(reader.state)),
+        )
+
+    def daily(self, provider: str, since: Optional[str] = None) -> List[Dict[str, Any]]:
+        """codexbar-style `daily[]` rows summed from the rollups, optionally from `since` onward."""
+        query = """
+            SELECT day, model, SUM(input_tokens), SUM(output_tokens),
+                   SUM(cache_read_tokens), SUM(cache_creation_tokens), SUM(cost)
+            FROM rollups WHERE provider = ?
+        """
+        params: List[Any] = [provider]
+        if since:
+            query += " AND day >= ?"
+            params.append(since)
+        query += " GROUP BY day, model"
+        rollup = DailyRollup(self.prices)
+        for day, model, *values in self.conn.execute(query, params):
+            rollup.add_row(day, model, values)
+        return rollup.daily()
+
+
+def read_indexed_logs(
+    provider: str,
+    prices: Optional[PriceTable] = None,
+    index_path: Optional[str] = None,
+    rebuild: bool = False,
+    since: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Refresh the on-disk index for `provider` and return one codexbar-style provider entry (days from `since` on)."""
+    try:
+        with UsageIndex(Path(index_path) if index_path else None, prices) as index:
+            if rebuild:
+                index.reset()
+            index.refresh(provider)
+            return build_payload(provider, index.daily(provider, since), source="logs-index")
+    except sqlite3.Error as exc:
+        raise RuntimeError(f"Usage index error: {exc}")
@@ -14,13 +14,30 @@ Usage:
 
 Multi-image editing (up to 14 images):
     uv run generate_image.py --prompt "combine these images" --filename "output.png" -i img1.png -i img2.png -i img3.png
+
+Reuse results for identical requests (same prompt, resolution and input images):
+    uv run generate_image.py --prompt "..." --filename "output.png" --cache
+
+Many images in one process (one JSON object per line: prompt, filename, and optionally
+resolution, input_images, output_format, compress_level, keep_alpha):
+    uv run generate_image.py --batch jobs.jsonl [--concurrency 4]
 """
 
 import argparse
+import json
 import os
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from image_cache import file_digest, open_cache
+from output_encode import DEFAULT_COMPRESS_LEVEL, FORMATS, format_for, write_output
+
+MODEL = "gemini-3-pro-image-preview"
+MAX_INPUT_IMAGES = 14
+RESOLUTIONS = ("1K", "2K", "4K")
+
 
 def get_api_key(provided_key: str | None) -> str | None:
     """Get API key from argument first, then environment."""
@@ -29,18 +46,276 @@ def get_api_key(provided_key: str | None) -> str | None:
     return os.environ.get("GEMINI_API_KEY")
 
 
+def client_factory(api_key: str):
+    """Create the genai client (and pay for the heavy imports) on first use, once per process."""
+    lock = threading.Lock()
+    clients = []
+
+    def get_client():
+        with lock:
+            if not clients:
+                from google import genai
+                clients.append(genai.Client(api_key=api_key))
+        return clients[0]
+
+    return get_client
+
+
+def cache_key(cache, job: dict) -> str:
+    try:
+        input_digests = [file_digest(Path(p)) for p in job["input_images"]]
+    except OSError as e:
+        raise RuntimeError(f"Cannot read input image: {e}") from e
+    return cache.key({
+        "tool": "nano-banana-pro",
+        "model": MODEL,
+        "prompt": job["prompt"],
+        "resolution": job["resolution"],
+        "inputs": input_digests,
+        "output": [job["output_format"], job["compress_level"], job["keep_alpha"]],
+    })
+
+
+def generate_image(
+    client,
+    prompt: str,
+    resolution: str,
+    input_paths: list[str],
+    log=print,
+    input_cache: bool = True,
+) -> bytes:
+    """Run one generation and return the image bytes as the API sent them. Raises RuntimeError."""
+    from google.genai import types
+
+    from input_prep import auto_resolution, open_prep_cache, prepare_inputs, read_size
+
+    # Prepare input images if provided (up to 14 supported by Nano Banana Pro)
+    prepared = []
+    output_resolution = resolution
+    if input_paths:
+        if len(input_paths) > MAX_INPUT_IMAGES:
+            raise RuntimeError(f"Too many input images ({len(input_paths)}). Maximum is {MAX_INPUT_IMAGES}.")
+
+        # Header-only size probe; the largest input decides the auto-resolution
+        max_input_dim = 0
+        for img_path in input_paths:
+            try:
+                width, height = read_size(img_path)
+            except Exception as e:
+                raise RuntimeError(f"Cannot load input image '{img_path}': {e}") from e
+            max_input_dim = max(max_input_dim, width, height)
+
+        # Auto-detect resolution from largest input if not explicitly set
+        if resolution == "1K":  # Default value
+            output_resolution = auto_resolution(resolution, max_input_dim)
+            log(f"Auto-detected resolution: {output_resolution} (from max input dimension {max_input_dim})")
+
+        # Decode, downscale and re-encode in parallel (cached by source digest)
+        try:
+            prepared = prepare_inputs(input_paths, output_resolution, open_prep_cache() if input_cache else None)
+        except Exception as e:
+            raise RuntimeError(f"Cannot prepare input images: {e}") from e
+        for image in prepared:
+            details = f"{image.source_size[0]}x{image.source_size[1]}"
+            if image.size != image.source_size:
+                details += f" -> {image.size[0]}x{image.size[1]}"
+            details += f", {len(image.data) // 1024} KB {image.mime_type}"
+            if image.cached:
+                details += ", cached"
+            log(f"Loaded input image: {image.path} ({details})")
+
+    # Build contents (images first if editing, prompt only if generating)
+    if prepared:
+        contents = [types.Part.from_bytes(data=image.data, mime_type=image.mime_type) for image in prepared]
+        contents.append(prompt)
+        img_count = len(prepared)
+        log(f"Processing {img_count} image{'s' if img_count > 1 else ''} with resolution {output_resolution}...")
+    else:
+        contents = prompt
+        log(f"Generating image with resolution {output_resolution}...")
+
+    try:
+        response = client.models.generate_content(
+            model=MODEL,
+            contents=contents,
+            config=types.GenerateContentConfig(
+                response_modalities=["TEXT", "IMAGE"],
+                image_config=types.ImageConfig(
+                    image_size=output_resolution
+                )
+            )
+        )
+    except Exception as e:
+        raise RuntimeError(f"Image generation failed: {e}") from e
+
+    image_data = None
+    for part in response.parts:
+        if part.text is not None:
+            log(f"Model response: {part.text}")
+        elif part.inline_data is not None:
+            # inline_data.data is already bytes, not base64
+            image_data = part.inline_data.data
+            if isinstance(image_data, str):
+                # If it's a string, it might be base64
+                import base64
+                image_data = base64.b64decode(image_data)
+
+    if image_data is None:
+        raise RuntimeError("No image was generated in the response.")
+    return image_data
+
+
+def lookup_job(job: dict, cache, log=print) -> tuple[str | None, bool]:
+    """Response cache key for `job` (None without a cache) and whether it was a hit."""
+    if not cache:
+        return None, False
+    key = cache_key(cache, job)
+    if cache.fetch(key, Path(job["filename"])):
+        log(f"Reused cached image from {cache.root}")
+        return key, True
+    return key, False
+
+
+def save_job(job: dict, image_data: bytes, cache, key: str | None, log=print) -> Path:
+    """Write the result in the job's output format and add it to the response cache."""
+    output_path = Path(job["filename"])
+    direct = write_output(image_data, output_path, job["output_format"], job["compress_level"], job["keep_alpha"])
+    if not direct:
+        log(f"Converted to {job['output_format']}")
+    if cache:
+        cache.store(key, output_path)
+    return output_path.resolve()
+
+
+def run_job(get_client, job: dict, cache, log=print, input_cache: bool = True) -> tuple[Path, bool]:
+    """Produce one image, from the cache when possible. Returns (resolved path, cached)."""
+    Path(job["filename"]).parent.mkdir(parents=True, exist_ok=True)
+
+    # A cache hit skips the API call (and the heavy imports) entirely
+    key, hit = lookup_job(job, cache, log)
+    if hit:
+        return Path(job["filename"]).resolve(), True
+
+    image_data = generate_image(get_client(), job["prompt"], job["resolution"], job["input_images"], log, input_cache)
+    return save_job(job, image_data, cache, key, log), False
+
+
+def parse_job(line: str, defaults: dict) -> dict:
+    try:
+        job = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"invalid JSON: {e}") from e
+    if not isinstance(job, dict):
+        raise ValueError("each line must be a JSON object")
+    for field in ("prompt", "filename"):
+        if not isinstance(job.get(field), str) or not job[field]:
+            raise ValueError(f"missing '{field}'")
+    for field, value in defaults.items():
+        job.setdefault(field, value)
+    if job["resolution"] not in RESOLUTIONS:
+        raise ValueError(f"resolution must be one of {', '.join(RESOLUTIONS)}")
+    job["output_format"] = format_for(job["filename"], job.get("output_format"))
+    if job["output_format"] not in FORMATS:
+        raise ValueError(f"output_format must be one of {', '.join(FORMATS)}")
+    if not isinstance(job["compress_level"], int) or not 0 <= job["compress_level"] <= 9:
+        raise ValueError("compress_level must be an integer from 0 to 9")
+    job["keep_alpha"] = bool(job["keep_alpha"])
+    input_images = job.get("input_images") or []
+    if isinstance(input_images, str):
+        input_images = [input_images]
+    if not isinstance(input_images, list) or not all(isinstance(p, str) for p in input_images):
+        raise ValueError("'input_images' must be a list of paths")
+    job["input_images"] = input_images
+    return job
+
+
+def run_batch(
+    batch_path: str,
+    get_client,
+    cache,
+    defaults: dict,
+    concurrency: int,
+    input_cache: bool = True,
+) -> int:
+    """
+    Run every job in a JSONL file with one shared client. Prints one JSON result per job
+    (in completion order) plus a MEDIA line per image; progress goes to stderr.
+    """
+    try:
+        if batch_path == "-":
+            lines = sys.stdin.read().splitlines()
+        else:
+            lines = Path(batch_path).read_text(encoding="utf-8").splitlines()
+    except OSError as e:
+        print(f"Error: Cannot read batch file: {e}", file=sys.stderr)
+        return 1
+
+    print_lock = threading.Lock()
+    results = []
+
+    def report(result: dict) -> None:
+        with print_lock:
+            results.append(result)
+            print(json.dumps(result), flush=True)
+            if result["ok"]:
+                # OpenClaw parses MEDIA tokens and will attach the file on supported providers.
+                print(f"MEDIA: {result['path']}", flush=True)
+
+    def finish(result: dict, future) -> None:
+        if future.exception() is not None:
+            result.update(ok=False, error=str(future.exception()))
+        else:
+            result.update(ok=True, path=str(future.result()), cached=False)
+        report(result)
+
+    # Writing (and any conversion) happens on the encoder thread, so a request worker
+    # moves on to its next job as soon as the image bytes arrive.
+    encoder = ThreadPoolExecutor(max_workers=2)
+
+    def process(line_no: int, line: str) -> None:
+        def log(message: str) -> None:
+            with print_lock:
+                print(f"[{line_no}] {message}", file=sys.stderr, flush=True)
+
+        result = {"line": line_no}
+        try:
+            job = parse_job(line, defaults)
+            result["filename"] = job["filename"]
+            Path(job["filename"]).parent.mkdir(parents=True, exist_ok=True)
+            key, hit = lookup_job(job, cache, log)
+            if hit:
+                result.update(ok=True, path=str(Path(job["filename"]).resolve()), cached=True)
+                report(result)
+                return
+            image_data = generate_image(
+                get_client(), job["prompt"], job["resolution"], job["input_images"], log, input_cache
+            )
+        except Exception as e:
+            result.update(ok=False, error=str(e))
+            report(result)
+            return
+        future = encoder.submit(save_job, job, image_data, cache, key, log)
+        future.add_done_callback(lambda f: finish(result, f))
+
+    jobs = [(n, line) for n, line in enumerate(lines, start=1) if line.strip() and not line.lstrip().startswith("#")]
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        list(pool.map(lambda job: process(*job), jobs))
+    encoder.shutdown()
+    failed = sum(1 for result in results if not result["ok"])
+    print(f"Batch done: {len(results) - failed} succeeded, {failed} failed.", file=sys.stderr)
+    return 1 if failed else 0
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Generate images using Nano Banana Pro (Gemini 3 Pro Image)"
     )
     parser.add_argument(
         "--prompt", "-p",
-        required=True,
         help="Image description/prompt"
     )
     parser.add_argument(
         "--filename", "-f",
-        required=True,
         help="Output filename (e.g., sunset-mountains.png)"
     )
     parser.add_argument(
@@ -52,16 +327,72 @@ def main():
     )
     parser.add_argument(
         "--resolution", "-r",
-        choices=["1K", "2K", "4K"],
+        choices=RESOLUTIONS,
         default="1K",
-        help="Output resolution: 1K (default), 2K, or 4K"
+        help="Output resolution: 1K (default), 2K, or 4K; also the default for --batch jobs"
+    )
+    parser.add_argument(
+        "--output-format",
+        choices=FORMATS,
+        help="Output image format (default: from the filename extension, else png)"
+    )
+    parser.add_argument(
+        "--compress-level",
+        type=int,
+        choices=range(10),
+        metavar="0-9",
+        default=DEFAULT_COMPRESS_LEVEL,
+        help=f"PNG compression level when the image has to be re-encoded (default: {DEFAULT_COMPRESS_LEVEL})"
+    )
+    parser.add_argument(
+        "--keep-alpha",
+        action="store_true",
+        help="Keep transparency (png/webp) instead of flattening onto white"
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="JOBS_JSONL",
+        help="Run many jobs in one process: a JSONL file (or - for stdin) with prompt, filename, "
+             "and optional resolution and input_images per line"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Parallel requests in --batch mode (default: 4)"
     )
     parser.add_argument(
         "--api-key", "-k",
         help="Gemini API key (overrides GEMINI_API_KEY env var)"
     )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Reuse the image from the local response cache for an identical request"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default="",
+        help="Cache directory (implies --cache; default: ~/.cache/openclaw/image-cache)"
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=float,
+        default=0,
+        help="Cache size limit in MB; least recently used images go first (default: 2048)"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Bypass the response cache (even if OPENCLAW_IMAGE_CACHE_DIR is set) and the input image cache"
+    )
 
     args = parser.parse_args()
+    if args.batch:
+        if args.prompt or args.filename or args.input_images:
+            parser.error("--batch takes prompts, filenames and input images from the jobs file")
+    elif not args.prompt or not args.filename:
+        parser.error("the following arguments are required: --prompt/-p, --filename/-f")
 
     # Get API key
     api_key = get_api_key(args.api_key)
@@ -72,113 +403,35 @@ def main():
         print("  2. Set GEMINI_API_KEY environment variable", file=sys.stderr)
         sys.exit(1)
 
-    # Import here after checking API key to avoid slow import on error
-    from google import genai
-    from google.genai import types
-    from PIL import Image as PILImage
-
-    # Initialise client
-    client = genai.Client(api_key=api_key)
-
-    # Set up output path
-    output_path = Path(args.filename)
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-
-    # Load input images if provided (up to 14 supported by Nano Banana Pro)
-    input_images = []
-    output_resolution = args.resolution
-    if args.input_images:
-        if len(args.input_images) > 14:
-            print(f"Error: Too many input images ({len(args.input_images)}). Maximum is 14.", file=sys.stderr)
-            sys.exit(1)
-
-        max_input_dim = 0
-        for img_path in args.input_images:
-            try:
-                img = PILImage.open(img_path)
-                input_images.append(img)
-                print(f"Loaded input image: {img_path}")
-
-                # Track largest dimension for auto-resolution
-                width, height = img.size
-                max_input_dim = max(max_input_dim, width, height)
-            except Exception as e:
-                print(f"Error loading input image '{img_path}': {e}", file=sys.stderr)
-                sys.exit(1)
+    cache = open_cache(args.cache, args.no_cache, args.cache_dir, args.cache_max_mb)
+    get_client = client_factory(api_key)
 
-        # Auto-detect resolution from largest input if not explicitly set
-        if args.resolution == "1K" and max_input_dim > 0:  # Default value
-            if max_input_dim >= 3000:
-                output_resolution = "4K"
-            elif max_input_dim >= 1500:
-                output_resolution = "2K"
-            else:
-                output_resolution = "1K"
-            print(f"Auto-detected resolution: {output_resolution} (from max input dimension {max_input_dim})")
-
-    # Build contents (images first if editing, prompt only if generating)
-    if input_images:
-        contents = [*input_images, args.prompt]
-        img_count = len(input_images)
-        print(f"Processing {img_count} image{'s' if img_count > 1 else ''} with resolution {output_resolution}...")
-    else:
-        contents = args.prompt
-        print(f"Generating image with resolution {output_resolution}...")
+    defaults = {
+        "resolution": args.resolution,
+        "output_format": args.output_format,
+        "compress_level": args.compress_level,
+        "keep_alpha": args.keep_alpha,
+    }
+    if args.batch:
+        sys.exit(run_batch(args.batch, get_client, cache, defaults, args.concurrency, not args.no_cache))
 
+    job = {
+        **defaults,
+        "prompt": args.prompt,
+        "filename": args.filename,
+        "input_images": args.input_images or [],
+        "output_format": format_for(args.filename, args.output_format),
+    }
     try:
-        response = client.models.generate_content(
-            model="gemini-3-pro-image-preview",
-            contents=contents,
-            config=types.GenerateContentConfig(
-                response_modalities=["TEXT", "IMAGE"],
-                image_config=types.ImageConfig(
-                    image_size=output_resolution
-                )
-            )
-        )
-
-        # Process response and convert to PNG
-        image_saved = False
-        for part in response.parts:
-            if part.text is not None:
-                print(f"Model response: {part.text}")
-            elif part.inline_data is not None:
-                # Convert inline data to PIL Image and save as PNG
-                from io import BytesIO
-
-                # inline_data.data is already bytes, not base64
-                image_data = part.inline_data.data
-                if isinstance(image_data, str):
-                    # If it's a string, it might be base64
-                    import base64
-                    image_data = base64.b64decode(image_data)
-
-                image = PILImage.open(BytesIO(image_data))
-
-                # Ensure RGB mode for PNG (convert RGBA to RGB with white background if needed)
-                if image.mode == 'RGBA':
-                    rgb_image = PILImage.new('RGB', image.size, (255, 255, 255))
-                    rgb_image.paste(image, mask=image.split()[3])
-                    rgb_image.save(str(output_path), 'PNG')
-                elif image.mode == 'RGB':
-                    image.save(str(output_path), 'PNG')
-                else:
-                    image.convert('RGB').save(str(output_path), 'PNG')
-                image_saved = True
-
-        if image_saved:
-            full_path = output_path.resolve()
-            print(f"\nImage saved: {full_path}")
-            # OpenClaw parses MEDIA tokens and will attach the file on supported providers.
-            print(f"MEDIA: {full_path}")
-        else:
-            print("Error: No image was generated in the response.", file=sys.stderr)
-            sys.exit(1)
-
+        full_path, _ = run_job(get_client, job, cache, input_cache=not args.no_cache)
     except Exception as e:
-        print(f"Error generating image: {e}", file=sys.stderr)
+        print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
 
+    print(f"\nImage saved: {full_path}")
+    # OpenClaw parses MEDIA tokens and will attach the file on supported providers.
+    print(f"MEDIA: {full_path}")
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache of generated images, shared by the image generation skills.
+
+Each entry is one output image, stored under the sha256 of the canonical JSON of every
+request argument that shapes it (tool, model, prompt, size, input-image digests, ...).
+Hits are materialized into the output directory as a reflink (copy-on-write clone)
+where the filesystem supports it, else a hardlink, else a plain copy. The cache is
+bounded by total size and the least recently used entries are evicted first. Use is
+recorded on a separate marker file per entry (access/<key>), never on the image
+itself: a hardlinked output shares the image's inode and timestamps.
+
+Each skill is packaged on its own, so this module is kept byte-for-byte identical in
+openai-image-gen/scripts and nano-banana-pro/scripts; change both together.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+
+DEFAULT_MAX_BYTES = 2 * 1024**3
+# Eviction trims to this fraction of max_bytes, so a full cache is not rescanned on every write.
+EVICT_TO = 0.9
+FICLONE = 0x40049409  # Linux ioctl: clone file extents (btrfs, xfs, ...)
+
+
+def default_cache_dir() -> Path:
+    configured = os.environ.get("OPENCLAW_IMAGE_CACHE_DIR")
+    if configured:
+        return Path(configured).expanduser()
+    cache_home = os.environ.get("XDG_CACHE_HOME")
+    base = Path(cache_home).expanduser() if cache_home else Path.home() / ".cache"
+    return base / "openclaw" / "image-cache"
+
+
+def open_cache(use_cache: bool, no_cache: bool, cache_dir: str = "", max_mb: float = 0) -> ImageCache | None:
+    """
+    The cache selected by --cache / --cache-dir / --no-cache. Off unless asked for, or unless
+    OPENCLAW_IMAGE_CACHE_DIR is set; --no-cache always wins.
+    """
+    if no_cache or not (use_cache or cache_dir or os.environ.get("OPENCLAW_IMAGE_CACHE_DIR")):
+        return None
+    max_bytes = int(max_mb * 1024 * 1024) if max_mb > 0 else DEFAULT_MAX_BYTES
+    return ImageCache(Path(cache_dir) if cache_dir else None, max_bytes)
+
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        while chunk := handle.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _reflink(src: Path, dst: Path) -> bool:
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    with open(src, "rb") as source, open(dst, "wb") as target:
+        try:
+            fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+            return True
+        except OSError:
+            pass
+    dst.unlink()
+    return False
+
+
+def clone_file(src: Path, dst: Path, allow_hardlink: bool = True) -> str:
+    """Place a copy of `src` at `dst` (replaced atomically); returns reflink/hardlink/copy."""
+    tmp = dst.with_name(f".{dst.name}.{os.getpid()}.{threading.get_ident()}.part")
+    try:
+        if _reflink(src, tmp):
+            method = "reflink"
+        else:
+            method = "copy"
+            if allow_hardlink:
+                try:
+                    os.link(src, tmp)
+                    method = "hardlink"
+                except OSError:
+                    pass
+            if method == "copy":
+                shutil.copyfile(src, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return method
+
+
+class ImageCache:
+    def __init__(self, root: Path | None = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root).expanduser() if root else default_cache_dir()
+        self.max_bytes = max_bytes
+        self.objects = self.root / "objects"
+        self.access = self.root / "access"
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        # Running estimate of the cache size; the directory is only walked when it
+        # passes max_bytes, not on every write.
+        self._size: int | None = None
+
+    @staticmethod
+    def key(params: dict) -> str:
+        canonical = json.dumps(params, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.objects / key[:2] / key
+
+    def _touch(self, key: str) -> None:
+        marker = self.access / key[:2] / key
+        try:
+            os.utime(marker)
+        except FileNotFoundError:
+            marker.parent.mkdir(parents=True, exist_ok=True)
+            marker.touch()
+
+    def fetch(self, key: str, dest: Path) -> bool:
+        """Materialize the cached image for `key` at `dest`; False on a miss."""
+        path = self._path(key)
+        try:
+            clone_file(path, dest)
+        except FileNotFoundError:
+            self.misses += 1
+            return False
+        self._touch(key)
+        self.hits += 1
+        return True
+
+    def read(self, key: str) -> bytes | None:
+        """Cached bytes for `key`, or None on a miss."""
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self._touch(key)
+        self.hits += 1
+        return data
+
+    def write(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.part")
+        try:
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        self._added(key, len(data))
+
+    def store(self, key: str, src: Path) -> None:
+        """Add a freshly generated image. Stored as an independent copy (reflink when possible)."""
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        clone_file(src, path, allow_hardlink=False)
+        self._added(key, path.stat().st_size)
+
+    def _added(self, key: str, size: int) -> None:
+        self._touch(key)
+        if self._size is None:
+            self.evict()
+        else:
+            self._size += size
+            if self._size > self.max_bytes:
+                self.evict()
+
+    def evict(self) -> None:
+        """Drop least recently used entries, down to EVICT_TO of max_bytes once it is exceeded."""
+        entries = []
+        total = 0
+        for path in self.objects.glob("*/*"):
+            if path.name.startswith("."):
+                continue
+            marker = self.access / path.parent.name / path.name
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            try:
+                used = marker.stat().st_mtime
+            except OSError:
+                used = st.st_mtime  # Stored before access markers existed
+            entries.append((used, st.st_size, path, marker))
+            total += st.st_size
+        if total > self.max_bytes:
+            target = int(self.max_bytes * EVICT_TO)
+            entries.sort()
+            for _, size, path, marker in entries:
+                if total <= target:
+                    break
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass  # Evicted by a concurrent run.
+                except OSError:
+                    continue
+                marker.unlink(missing_ok=True)
+                total -= size
+        self._size = total
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Writing generated images to disk for generate_image.py.
+
+The API usually returns a PNG (or JPEG) that needs no further work: when it already
+matches the requested format and has no alpha to flatten, the bytes are written as-is
+with no decode. Otherwise the image is decoded once, flattened onto white unless
+--keep-alpha is given (always for JPEG), and encoded as PNG, JPEG or WebP.
+"""
+
+import io
+import os
+import struct
+from pathlib import Path
+
+FORMATS = ("png", "jpeg", "webp")
+DEFAULT_COMPRESS_LEVEL = 6
+JPEG_QUALITY = 92
+WEBP_QUALITY = 90
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_SUFFIX_FORMATS = {".png": "png", ".jpg": "jpeg", ".jpeg": "jpeg", ".webp": "webp"}
+
+
+def format_for(filename: str, requested: str | None) -> str:
+    """--output-format if given, else the filename's extension, else PNG."""
+    if requested:
+        return requested
+    return _SUFFIX_FORMATS.get(Path(filename).suffix.lower(), "png")
+
+
+def png_has_alpha(data: bytes) -> bool | None:
+    """Whether PNG bytes carry transparency (alpha channel or tRNS); None if not a PNG."""
+    if not data.startswith(_PNG_SIGNATURE):
+        return None
+    pos = len(_PNG_SIGNATURE)
+    while pos + 8 <= len(data):
+        length, chunk = struct.unpack(">I4s", data[pos : pos + 8])
+        if chunk == b"IHDR":
+            if len(data) < pos + 18:  # Truncated header: let the caller decode it properly
+                return None
+            if data[pos + 17] in (4, 6):  # grayscale + alpha, RGBA
+                return True
+        elif chunk == b"tRNS":
+            return True
+        elif chunk == b"IDAT":
+            return False
+        pos += 12 + length
+    return None
+
+
+def _passthrough(data: bytes, fmt: str, keep_alpha: bool) -> bool:
+    if fmt == "png":
+        alpha = png_has_alpha(data)
+        return alpha is not None and (keep_alpha or not alpha)
+    if fmt == "jpeg":
+        return data.startswith(b"\xff\xd8\xff")
+    return False
+
+
+def encode(data: bytes, fmt: str, compress_level: int = DEFAULT_COMPRESS_LEVEL, keep_alpha: bool = False) -> bytes:
+    from PIL import Image as PILImage
+
+    image = PILImage.open(io.BytesIO(data))
+    has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+    if has_alpha and (keep_alpha and fmt != "jpeg"):
+        image = image.convert("RGBA")
+    elif has_alpha:
+        # Flatten onto a white background
+        rgba = image.convert("RGBA")
+        image = PILImage.new("RGB", rgba.size, (255, 255, 255))
+        image.paste(rgba, mask=rgba.split()[3])
+    elif image.mode != "RGB":
+        image = image.convert("RGB")
+
+    out = io.BytesIO()
+    if fmt == "png":
+        image.save(out, "PNG", compress_level=compress_level)
+    elif fmt == "jpeg":
+        image.save(out, "JPEG", quality=JPEG_QUALITY)
+    else:
+        image.save(out, "WEBP", quality=WEBP_QUALITY)
+    return out.getvalue()
+
+
+def write_output(
+    data: bytes,
+    output_path: Path,
+    fmt: str,
+    compress_level: int = DEFAULT_COMPRESS_LEVEL,
+    keep_alpha: bool = False,
+) -> bool:
+    """
+    Write `data` to `output_path` in `fmt`, via a temp file and rename (a previous cached
+    result there may be a hardlink into the cache). Returns True if no re-encode was needed.
+    """
+    direct = _passthrough(data, fmt, keep_alpha)
+    if not direct:
+        data = encode(data, fmt, compress_level, keep_alpha)
+    tmp_path = output_path.with_name(f".{output_path.name}.part")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, output_path)
+    return direct
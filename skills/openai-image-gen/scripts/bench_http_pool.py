@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark gen.py's pooled HTTP client against one connection per request (the old urllib path).
+
+Runs a local stub of the Images API (POST /v1/images/generations returning an image URL, then
+GET of that URL) and times the generate + download round trip, optionally over TLS with a
+throwaway self-signed certificate (needs the openssl CLI).
+
+Usage:
+    python3 bench_http_pool.py [--requests 200] [--tls] [--image-kb 256]
+"""
+
+import argparse
+import json
+import shutil
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from http_pool import ConnectionPool, httpx, make_pool
+
+
+def start_stub(image_kb: int, tls_dir: Path | None) -> tuple[ThreadingHTTPServer, str]:
+    image = b"\x89PNG" + b"\0" * (image_kb * 1024 - 4)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out in separate writes; without this, Nagle + delayed ACK
+        # stall every keep-alive response by ~40 ms.
+        disable_nagle_algorithm = True
+
+        def do_POST(self) -> None:
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            body = json.dumps({"data": [{"url": f"{base}/img/1.png"}]}).encode("utf-8")
+            self._send(body, "application/json")
+
+        def do_GET(self) -> None:
+            self._send(image, "image/png")
+
+        def _send(self, body: bytes, content_type: str) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    scheme = "http"
+    if tls_dir:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(tls_dir / "cert.pem", tls_dir / "key.pem")
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        scheme = "https"
+    base = f"{scheme}://localhost:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, base
+
+
+def make_cert(directory: Path) -> None:
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+            "-subj", "/CN=localhost", "-addext", "subjectAltName=DNS:localhost",
+            "-keyout", str(directory / "key.pem"), "-out", str(directory / "cert.pem"),
+        ],
+        check=True,
+        capture_output=True,
+    )
+
+
+def run_urllib(base: str, requests: int, context: ssl.SSLContext | None) -> None:
+    for _ in range(requests):
+        req = urllib.request.Request(
+            f"{base}/v1/images/generations", method="POST", data=b"{}", headers={"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(req, timeout=30, context=context) as resp:
+            url = json.loads(resp.read())["data"][0]["url"]
+        with urllib.request.urlopen(url, timeout=30, context=context) as resp:
+            resp.read()
+
+
+def run_pool(pool, base: str, requests: int) -> None:
+    for _ in range(requests):
+        with pool.request("POST", f"{base}/v1/images/generations", body=b"{}", headers={"Content-Type": "application/json"}) as resp:
+            url = json.loads(resp.read())["data"][0]["url"]
+        with pool.request("GET", url) as resp:
+            resp.read()
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Benchmark pooled vs per-request HTTP connections.")
+    ap.add_argument("--requests", type=int, default=200, help="Generate + download round trips per variant.")
+    ap.add_argument("--image-kb", type=int, default=256, help="Size of the stub image download.")
+    ap.add_argument("--tls", action="store_true", help="Serve over HTTPS with a self-signed cert (needs openssl).")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tls_dir = None
+        context = None
+        if args.tls:
+            if not shutil.which("openssl"):
+                print("--tls needs the openssl CLI on PATH.")
+                return 1
+            tls_dir = Path(tmp)
+            make_cert(tls_dir)
+            context = ssl.create_default_context(cafile=str(tls_dir / "cert.pem"))
+        server, base = start_stub(args.image_kb, tls_dir)
+
+        variants = [
+            ("new connection per request (urllib)", lambda: run_urllib(base, args.requests, context)),
+            ("keep-alive pool (http.client)", lambda: run_pool(ConnectionPool(ssl_context=context), base, args.requests)),
+        ]
+        if httpx is not None:
+            variants.append(("httpx pool", lambda: run_pool(make_pool(ssl_context=context), base, args.requests)))
+
+        print(f"{args.requests} round trips against {base} ({args.image_kb} KB image)")
+        baseline = None
+        for label, fn in variants:
+            fn()  # warm-up
+            started = time.perf_counter()
+            fn()
+            per_request = (time.perf_counter() - started) / args.requests * 1000
+            baseline = baseline or per_request
+            print(f"{label:38s} {per_request:7.3f} ms/request  ({baseline / per_request:.2f}x)")
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Paginated HTML gallery for gen.py output, kept up to date while a job runs.
+
+Each page shows small previews that link to the full-size image, so the browser only
+loads the originals that are clicked. Previews (WebP, or JPEG where Pillow lacks WebP)
+are made in a process pool when Pillow is installed; without it the pages fall back
+to lazily loaded full-size images. As each image finishes, only its page is rewritten;
+pages with pending images reload themselves until the job is done.
+"""
+
+from __future__ import annotations
+
+import html
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+
+try:
+    from PIL import Image, features
+except ImportError:  # Optional; without it the gallery shows the originals.
+    Image = None
+
+DEFAULT_PAGE_SIZE = 60
+THUMB_SIZE = 384
+THUMB_DIR = "thumbs"
+
+
+def thumbnail_ext() -> str:
+    return "webp" if Image is not None and features.check("webp") else "jpg"
+
+
+def make_thumbnail(src: str, dst: str, size: int = THUMB_SIZE) -> str:
+    """Write a preview of `src` no larger than size x size to `dst` (runs in a worker process)."""
+    with Image.open(src) as img:
+        img.draft("RGB", (size, size))
+        img.thumbnail((size, size))
+        if dst.endswith(".jpg"):
+            img = img.convert("RGB")
+            options = {"quality": 82, "optimize": True}
+        else:
+            options = {"quality": 80, "method": 4}
+        tmp = f"{dst}.part"
+        img.save(tmp, "WEBP" if dst.endswith(".webp") else "JPEG", **options)
+    os.replace(tmp, dst)
+    return dst
+
+
+def page_name(page: int) -> str:
+    return "index.html" if page == 0 else f"page-{page + 1}.html"
+
+
+class Gallery:
+    """
+    `items` are the manifest items (prompt, file, status). Call image_done() with an item's
+    position in `items` as images land, and close() at the end to finish pending previews
+    and drop the auto-refresh.
+    """
+
+    def __init__(self, out_dir: Path, items: list[dict], page_size: int = DEFAULT_PAGE_SIZE, workers: int | None = None):
+        self.out_dir = out_dir
+        self.items = items
+        self.page_size = max(1, page_size)
+        self.pages = max(1, -(-len(items) // self.page_size))
+        self.thumbs: dict[int, str] = {}
+        self.finished = False
+        self._lock = threading.Lock()
+        self._pending: list[Future] = []
+        self._pool = None
+        self._ext = thumbnail_ext()
+        if Image is not None:
+            (out_dir / THUMB_DIR).mkdir(exist_ok=True)
+            # spawn: gen.py is multi-threaded by the time previews are requested.
+            self._pool = ProcessPoolExecutor(
+                max_workers=workers or min(4, os.cpu_count() or 1),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+    def _thumb_path(self, item: dict) -> Path:
+        return self.out_dir / THUMB_DIR / f"{Path(item['file']).stem}.{self._ext}"
+
+    def start(self) -> None:
+        """Write every page, reusing previews from an earlier run that are still current."""
+        for pos, item in enumerate(self.items):
+            if item.get("status") != "done":
+                continue
+            image = self.out_dir / item["file"]
+            thumb = self._thumb_path(item)
+            try:
+                if thumb.stat().st_mtime >= image.stat().st_mtime:
+                    self.thumbs[pos] = thumb.relative_to(self.out_dir).as_posix()
+                    continue
+            except OSError:
+                pass
+            self._submit(pos, item)
+        for page in range(self.pages):
+            self._write_page(page)
+
+    def image_done(self, pos: int) -> None:
+        item = self.items[pos]
+        self.thumbs.pop(pos, None)
+        if not self._submit(pos, item):
+            self._write_page(pos // self.page_size)
+
+    def _submit(self, pos: int, item: dict) -> bool:
+        if self._pool is None:
+            return False
+        try:
+            future = self._pool.submit(make_thumbnail, str(self.out_dir / item["file"]), str(self._thumb_path(item)))
+        except RuntimeError:
+            # BrokenProcessPool (a worker died); previews are a nicety, the job carries on without them.
+            self._pool = None
+            return False
+        future.add_done_callback(lambda f: self._thumb_ready(pos, f))
+        with self._lock:
+            self._pending.append(future)
+        return True
+
+    def _thumb_ready(self, pos: int, future: Future) -> None:
+        if not future.cancelled() and future.exception() is None:
+            self.thumbs[pos] = Path(future.result()).relative_to(self.out_dir).as_posix()
+        # A failed preview (e.g. an unreadable image) just shows the original.
+        self._write_page(pos // self.page_size)
+
+    def close(self) -> None:
+        with self._lock:
+            pending = list(self._pending)
+        for future in pending:
+            try:
+                future.result()
+            except Exception:
+                pass
+        if self._pool is not None:
+            self._pool.shutdown()
+        self.finished = True
+        for page in range(self.pages):
+            self._write_page(page)
+
+    def _figure(self, pos: int, item: dict) -> str:
+        prompt = html.escape(item["prompt"])
+        if item.get("status") != "done":
+            return f"""<figure class="pending">
+  <div class="placeholder">{html.escape(item.get("status") or "pending")}</div>
+  <figcaption>{prompt}</figcaption>
+</figure>"""
+        full = html.escape(item["file"])
+        preview = html.escape(self.thumbs.get(pos, item["file"]))
+        return f"""<figure>
+  <a href="{full}"><img src="{preview}" loading="lazy" /></a>
+  <figcaption>{prompt}</figcaption>
+</figure>"""
+
+    def _nav(self, page: int) -> str:
+        if self.pages == 1:
+            return ""
+        links = []
+        for other in range(self.pages):
+            if other == page:
+                links.append(f"<strong>{other + 1}</strong>")
+            else:
+                links.append(f'<a href="{page_name(other)}">{other + 1}</a>')
+        return f'<nav>{" ".join(links)}</nav>'
+
+    def _write_page(self, page: int) -> None:
+        # Rendered under the lock too, so a stale render can never overwrite a newer one.
+        with self._lock:
+            self._render_page(page)
+
+    def _render_page(self, page: int) -> None:
+        start = page * self.page_size
+        chunk = self.items[start : start + self.page_size]
+        figures = "\n".join(self._figure(start + offset, item) for offset, item in enumerate(chunk))
+        in_progress = not self.finished and any(item.get("status") != "done" for item in chunk)
+        refresh = '<meta http-equiv="refresh" content="5" />\n' if in_progress else ""
+        nav = self._nav(page)
+        doc = f"""<!doctype html>
+<meta charset="utf-8" />
+{refresh}<title>openai-image-gen</title>
+<style>
+  :root {{ color-scheme: dark; }}
+  body {{ margin: 24px; font: 14px/1.4 ui-sans-serif, system-ui; background: #0b0f14; color: #e8edf2; }}
+  h1 {{ font-size: 18px; margin: 0 0 16px; }}
+  .grid {{ display: grid; grid-template-columns: repeat(auto-fill, minmax(240px, 1fr)); gap: 16px; }}
+  figure {{ margin: 0; padding: 12px; border: 1px solid #1e2a36; border-radius: 14px; background: #0f1620; }}
+  img {{ width: 100%; height: auto; border-radius: 10px; display: block; }}
+  figcaption {{ margin-top: 10px; color: #b7c2cc; }}
+  code {{ color: #9cd1ff; }}
+  nav {{ margin: 16px 0; }}
+  nav a, nav strong {{ margin-right: 8px; }}
+  nav a {{ color: #9cd1ff; }}
+  .placeholder {{ aspect-ratio: 1; border-radius: 10px; background: #16202b; color: #6b7a88; display: grid; place-items: center; }}
+</style>
+<h1>openai-image-gen</h1>
+<p>Output: <code>{html.escape(self.out_dir.as_posix())}</code></p>
+{nav}
+<div class="grid">
+{figures}
+</div>
+{nav}
+"""
+        path = self.out_dir / page_name(page)
+        tmp = path.with_name(f".{path.name}.part")
+        tmp.write_text(doc, encoding="utf-8")
+        os.replace(tmp, path)
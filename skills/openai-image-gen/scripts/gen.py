@@ -1,15 +1,42 @@
 #!/usr/bin/env python3
+from __future__ import annotations
+
 import argparse
 import base64
 import datetime as dt
+import email.utils
+import hashlib
+import http.client
 import json
 import os
 import random
 import re
 import sys
-import urllib.error
-import urllib.request
+import threading
+import time
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
 from pathlib import Path
+from urllib.parse import urljoin
+
+from gallery import DEFAULT_PAGE_SIZE, Gallery
+from http_pool import make_pool
+from image_cache import open_cache
+from image_stream import CHUNK_SIZE, read_images_response, temp_path
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+MAX_REDIRECTS = 5
+MANIFEST_NAME = "manifest.json"
+MAX_BACKOFF = 60.0
+
+_default_client = None
+
+
+def default_client():
+    """Process-wide pooled HTTP client, for callers that don't pass their own."""
+    global _default_client
+    if _default_client is None:
+        _default_client = make_pool()
+    return _default_client
 
 
 def slugify(text: str) -> str:
@@ -74,6 +101,119 @@ def get_model_defaults(model: str) -> tuple[str, str]:
         return ("1024x1024", "high")
 
 
+class ApiError(RuntimeError):
+    def __init__(self, message: str, status: int, retry_after: float | None = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Retry-After as seconds to wait; accepts delta-seconds or an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=dt.timezone.utc)
+    return max(0.0, (when - dt.datetime.now(dt.timezone.utc)).total_seconds())
+
+
+def with_retries(fn, retries: int, label: str = ""):
+    """Call fn(), retrying 429 / 5xx / connection errors with exponential backoff and jitter."""
+    for attempt in range(retries + 1):
+        try:
+            return fn()
+        except ApiError as e:
+            if (e.status != 429 and e.status < 500) or attempt == retries:
+                raise
+            delay = e.retry_after
+            reason = f"HTTP {e.status}"
+        except (OSError, http.client.HTTPException) as e:
+            if attempt == retries:
+                raise
+            delay = None
+            reason = type(e).__name__
+        if delay is None:
+            delay = min(MAX_BACKOFF, 2.0**attempt) * random.uniform(0.5, 1.0)
+        print(f"{label}{reason}, retrying in {delay:.1f}s ({attempt + 1}/{retries})", file=sys.stderr, flush=True)
+        time.sleep(delay)
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        while chunk := handle.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Manifest:
+    """Job state in <out-dir>/manifest.json, rewritten atomically after every change."""
+
+    def __init__(self, out_dir: Path, params: dict, items: list[dict]):
+        self.path = out_dir / MANIFEST_NAME
+        self.params = params
+        self.items = items
+        self.lock = threading.Lock()
+
+    @classmethod
+    def create(cls, out_dir: Path, params: dict, prompts: list[str], file_ext: str) -> "Manifest":
+        items = [
+            {
+                "index": idx,
+                "prompt": prompt,
+                "file": f"{idx:03d}-{slugify(prompt)[:40]}.{file_ext}",
+                "status": "pending",
+                "sha256": None,
+                "error": None,
+            }
+            for idx, prompt in enumerate(prompts, start=1)
+        ]
+        manifest = cls(out_dir, params, items)
+        manifest.save()
+        return manifest
+
+    @classmethod
+    def load(cls, out_dir: Path) -> "Manifest":
+        path = out_dir / MANIFEST_NAME
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            raise RuntimeError(f"Cannot resume: failed to read {path}: {e}") from e
+        return cls(out_dir, data["params"], data["items"])
+
+    def update(self, item: dict, **fields) -> None:
+        with self.lock:
+            item.update(fields)
+            self.save()
+
+    def save(self) -> None:
+        tmp = temp_path(self.path)
+        tmp.write_text(json.dumps({"params": self.params, "items": self.items}, indent=2), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def is_done(self, item: dict) -> bool:
+        path = self.path.parent / item["file"]
+        return item["status"] == "done" and path.is_file() and file_sha256(path) == item["sha256"]
+
+
+def max_images_per_request(model: str) -> int:
+    """Largest `n` the Images API accepts for one call to `model`."""
+    if model == "dall-e-3":
+        return 1
+    if model == "dall-e-2" or model.startswith("gpt-image"):
+        return 10
+    # Unknown / future models: don't assume batching is supported.
+    return 1
+
+
 def request_images(
     api_key: str,
     prompt: str,
@@ -83,13 +223,22 @@ def request_images(
     background: str = "",
     output_format: str = "",
     style: str = "",
+    n: int = 1,
+    client=None,
+    targets: list[Path] | None = None,
 ) -> dict:
-    url = "https://api.openai.com/v1/images/generations"
+    """
+    Call the Images API. With `targets`, b64_json images are decoded straight into
+    targets[0], targets[1], ... as the response streams in, and each b64_json value in
+    the returned dict is replaced by its index into `targets`.
+    """
+    base_url = (os.environ.get("OPENAI_BASE_URL") or DEFAULT_BASE_URL).rstrip("/")
+    url = f"{base_url}/images/generations"
     args = {
         "model": model,
         "prompt": prompt,
         "size": size,
-        "n": 1,
+        "n": n,
     }
 
     # Quality parameter - dall-e-2 doesn't accept this parameter
@@ -109,55 +258,90 @@ def request_images(
         args["style"] = style
 
     body = json.dumps(args).encode("utf-8")
-    req = urllib.request.Request(
-        url,
-        method="POST",
-        headers={
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json",
-        },
-        data=body,
-    )
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+    }
+    with (client or default_client()).request("POST", url, body=body, headers=headers) as resp:
+        if resp.status >= 400:
+            payload = resp.read().decode("utf-8", errors="replace")
+            raise ApiError(
+                f"OpenAI Images API failed ({resp.status}): {payload}",
+                resp.status,
+                parse_retry_after(resp.getheader("Retry-After")),
+            )
+        if targets is not None:
+            return read_images_response(resp, targets)
+        return json.loads(resp.read().decode("utf-8"))
+
+
+def download(url: str, filepath: Path, client=None) -> None:
+    client = client or default_client()
     try:
-        with urllib.request.urlopen(req, timeout=300) as resp:
-            return json.loads(resp.read().decode("utf-8"))
-    except urllib.error.HTTPError as e:
-        payload = e.read().decode("utf-8", errors="replace")
-        raise RuntimeError(f"OpenAI Images API failed ({e.code}): {payload}") from e
-
-
-def write_gallery(out_dir: Path, items: list[dict]) -> None:
-    thumbs = "\n".join(
-        [
-            f"""
-<figure>
-  <a href="{it["file"]}"><img src="{it["file"]}" loading="lazy" /></a>
-  <figcaption>{it["prompt"]}</figcaption>
-</figure>
-""".strip()
-            for it in items
-        ]
-    )
-    html = f"""<!doctype html>
-<meta charset="utf-8" />
-<title>openai-image-gen</title>
-<style>
-  :root {{ color-scheme: dark; }}
-  body {{ margin: 24px; font: 14px/1.4 ui-sans-serif, system-ui; background: #0b0f14; color: #e8edf2; }}
-  h1 {{ font-size: 18px; margin: 0 0 16px; }}
-  .grid {{ display: grid; grid-template-columns: repeat(auto-fill, minmax(240px, 1fr)); gap: 16px; }}
-  figure {{ margin: 0; padding: 12px; border: 1px solid #1e2a36; border-radius: 14px; background: #0f1620; }}
-  img {{ width: 100%; height: auto; border-radius: 10px; display: block; }}
-  figcaption {{ margin-top: 10px; color: #b7c2cc; }}
-  code {{ color: #9cd1ff; }}
-</style>
-<h1>openai-image-gen</h1>
-<p>Output: <code>{out_dir.as_posix()}</code></p>
-<div class="grid">
-{thumbs}
-</div>
-"""
-    (out_dir / "index.html").write_text(html, encoding="utf-8")
+        for _ in range(MAX_REDIRECTS + 1):
+            with client.request("GET", url) as resp:
+                location = resp.getheader("Location")
+                if resp.status in (301, 302, 303, 307, 308) and location:
+                    resp.read()
+                    url = urljoin(url, location)
+                    continue
+                if resp.status >= 400:
+                    raise RuntimeError(f"Failed to download image from {url}: HTTP {resp.status}")
+                # Stream to a temp file and rename, so a failed download never leaves a partial image.
+                tmp = temp_path(filepath)
+                try:
+                    with open(tmp, "wb") as handle:
+                        while chunk := resp.read(CHUNK_SIZE):
+                            handle.write(chunk)
+                    os.replace(tmp, filepath)
+                except BaseException:
+                    tmp.unlink(missing_ok=True)
+                    raise
+                return
+    except OSError as e:
+        raise RuntimeError(f"Failed to download image from {url}: {e}") from e
+    raise RuntimeError(f"Failed to download image from {url}: too many redirects")
+
+
+class TokenBucket:
+    """Thread-safe limiter allowing `per_minute` acquisitions per minute, spaced evenly."""
+
+    def __init__(self, per_minute: float, capacity: float = 1.0):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                # A request for more than `capacity` waits for a full bucket, then goes into debt.
+                if self.tokens >= min(tokens, self.capacity):
+                    self.tokens -= tokens
+                    return
+                delay = (min(tokens, self.capacity) - self.tokens) / self.rate
+            time.sleep(delay)
+
+
+def save_image(data: dict, filepath: Path, client=None) -> None:
+    image_b64 = data.get("b64_json")
+    image_url = data.get("url")
+    if isinstance(image_b64, int) and not isinstance(image_b64, bool):
+        # Already decoded to disk by read_images_response().
+        return
+    if not image_b64 and not image_url:
+        raise RuntimeError(f"Unexpected response item: {json.dumps(data)[:400]}")
+    if image_b64:
+        # Write-then-rename: the old file may be a hardlink into the image cache.
+        tmp = temp_path(filepath)
+        tmp.write_bytes(base64.b64decode(image_b64))
+        os.replace(tmp, filepath)
+    else:
+        download(image_url, filepath, client)
 
 
 def main() -> int:
@@ -171,6 +355,25 @@ def main() -> int:
     ap.add_argument("--output-format", default="", help="Output format (GPT models only): png, jpeg, or webp.")
     ap.add_argument("--style", default="", help="Image style (dall-e-3 only): vivid or natural.")
     ap.add_argument("--out-dir", default="", help="Output directory (default: ./tmp/openai-image-gen-<ts>).")
+    ap.add_argument("--concurrency", type=int, default=1, help="Parallel API requests (default: 1).")
+    ap.add_argument("--rate-limit", type=float, default=0, help="Max images per minute across all workers (0 = unlimited).")
+    ap.add_argument("--retries", type=int, default=4, help="Retries per request on 429/5xx/connection errors (default: 4).")
+    ap.add_argument(
+        "--resume",
+        metavar="OUT_DIR",
+        default="",
+        help="Resume the job in OUT_DIR from its manifest.json: skip finished images, regenerate failed or missing ones.",
+    )
+    ap.add_argument(
+        "--gallery-page-size",
+        type=int,
+        default=DEFAULT_PAGE_SIZE,
+        help=f"Images per gallery page (default: {DEFAULT_PAGE_SIZE}).",
+    )
+    ap.add_argument("--cache", action="store_true", help="Reuse images from the local response cache for identical requests.")
+    ap.add_argument("--cache-dir", default="", help="Cache directory (implies --cache; default: ~/.cache/openclaw/image-cache).")
+    ap.add_argument("--cache-max-mb", type=float, default=0, help="Cache size limit in MB; least recently used images go first (default: 2048).")
+    ap.add_argument("--no-cache", action="store_true", help="Bypass the cache even if OPENCLAW_IMAGE_CACHE_DIR is set.")
     args = ap.parse_args()
 
     api_key = (os.environ.get("OPENAI_API_KEY") or "").strip()
@@ -178,60 +381,144 @@ def main() -> int:
         print("Missing OPENAI_API_KEY", file=sys.stderr)
         return 2
 
-    # Apply model-specific defaults if not specified
-    default_size, default_quality = get_model_defaults(args.model)
-    size = args.size or default_size
-    quality = args.quality or default_quality
+    if args.resume:
+        out_dir = Path(args.resume).expanduser()
+        manifest = Manifest.load(out_dir)
+        params = manifest.params
+    else:
+        # Apply model-specific defaults if not specified
+        default_size, default_quality = get_model_defaults(args.model)
+        params = {
+            "model": args.model,
+            "size": args.size or default_size,
+            "quality": args.quality or default_quality,
+            "background": args.background,
+            "output_format": args.output_format,
+            "style": args.style,
+        }
+        out_dir = Path(args.out_dir).expanduser() if args.out_dir else default_out_dir()
+        out_dir.mkdir(parents=True, exist_ok=True)
 
-    count = args.count
-    if args.model == "dall-e-3" and count > 1:
-        print(f"Warning: dall-e-3 only supports generating 1 image at a time. Reducing count from {count} to 1.", file=sys.stderr)
-        count = 1
+        count = args.count
+        prompts = [args.prompt] * count if args.prompt else pick_prompts(count)
 
-    out_dir = Path(args.out_dir).expanduser() if args.out_dir else default_out_dir()
-    out_dir.mkdir(parents=True, exist_ok=True)
+        # Determine file extension based on output format
+        if args.model.startswith("gpt-image") and args.output_format:
+            file_ext = args.output_format
+        else:
+            file_ext = "png"
+        manifest = Manifest.create(out_dir, params, prompts, file_ext)
 
-    prompts = [args.prompt] * count if args.prompt else pick_prompts(count)
+    todo = [item for item in manifest.items if not manifest.is_done(item)]
+    total = len(manifest.items)
+    if args.resume:
+        print(f"Resuming {out_dir.as_posix()}: {total - len(todo)}/{total} done, {len(todo)} to generate.")
 
-    # Determine file extension based on output format
-    if args.model.startswith("gpt-image") and args.output_format:
-        file_ext = args.output_format
-    else:
-        file_ext = "png"
-
-    items: list[dict] = []
-    for idx, prompt in enumerate(prompts, start=1):
-        print(f"[{idx}/{len(prompts)}] {prompt}")
-        res = request_images(
-            api_key,
-            prompt,
-            args.model,
-            size,
-            quality,
-            args.background,
-            args.output_format,
-            args.style,
-        )
-        data = res.get("data", [{}])[0]
-        image_b64 = data.get("b64_json")
-        image_url = data.get("url")
-        if not image_b64 and not image_url:
-            raise RuntimeError(f"Unexpected response: {json.dumps(res)[:400]}")
-
-        filename = f"{idx:03d}-{slugify(prompt)[:40]}.{file_ext}"
-        filepath = out_dir / filename
-        if image_b64:
-            filepath.write_bytes(base64.b64decode(image_b64))
+    cache = open_cache(args.cache, args.no_cache, args.cache_dir, args.cache_max_mb)
+    cache_keys: dict[int, str] = {}
+    if cache:
+        # The k-th repeat of a prompt gets its own entry, so --count 4 still yields 4 distinct images.
+        seen: dict[str, int] = {}
+        for item in manifest.items:
+            variant = seen.get(item["prompt"], 0)
+            seen[item["prompt"]] = variant + 1
+            cache_keys[item["index"]] = cache.key(
+                {"tool": "openai-image-gen", **params, "prompt": item["prompt"], "variant": variant}
+            )
+        missing = []
+        for item in todo:
+            target = out_dir / item["file"]
+            if cache.fetch(cache_keys[item["index"]], target):
+                manifest.update(item, status="done", sha256=file_sha256(target), error=None)
+            else:
+                missing.append(item)
+        todo = missing
+        if cache.hits:
+            print(f"Cache: {cache.hits} image(s) reused from {cache.root.as_posix()}, {len(todo)} to generate.")
+
+    # Pages (and previews) are written now and refreshed as each image lands.
+    gallery = Gallery(out_dir, manifest.items, args.gallery_page_size)
+    gallery.start()
+
+    limiter = TokenBucket(args.rate_limit) if args.rate_limit > 0 else None
+    # One keep-alive pool shared by every worker, for both API calls and image downloads.
+    client = make_pool(max_per_host=max(1, args.concurrency))
+    print_lock = threading.Lock()
+
+    # Repeats of the same prompt go out as one request with n > 1 where the model allows it.
+    batch_size = max_images_per_request(params["model"])
+    batches: list[list[dict]] = []
+    for item in todo:
+        if batches and batches[-1][0]["prompt"] == item["prompt"] and len(batches[-1]) < batch_size:
+            batches[-1].append(item)
+        else:
+            batches.append([item])
+
+    def generate(batch: list[dict]) -> None:
+        prompt = batch[0]["prompt"]
+        n = len(batch)
+        indices = [item["index"] for item in batch]
+        if n == 1:
+            label = f"{indices[0]}"
+        elif indices[-1] - indices[0] == n - 1:
+            label = f"{indices[0]}-{indices[-1]}"
         else:
-            try:
-                urllib.request.urlretrieve(image_url, filepath)
-            except urllib.error.URLError as e:
-                raise RuntimeError(f"Failed to download image from {image_url}: {e}") from e
+            label = ",".join(str(idx) for idx in indices)
+        targets = [out_dir / item["file"] for item in batch]
 
-        items.append({"prompt": prompt, "file": filename})
+        def attempt() -> None:
+            if limiter:
+                limiter.acquire(n)
+            res = request_images(
+                api_key,
+                prompt,
+                params["model"],
+                params["size"],
+                params["quality"],
+                params["background"],
+                params["output_format"],
+                params["style"],
+                n=n,
+                client=client,
+                targets=targets,
+            )
+            data = res.get("data") or []
+            if len(data) < n:
+                raise RuntimeError(f"Expected {n} images, got {len(data)}: {json.dumps(res)[:400]}")
+            for image, target in zip(data, targets):
+                save_image(image, target, client)
+
+        with print_lock:
+            print(f"[{label}/{total}] {prompt}", flush=True)
+        try:
+            with_retries(attempt, args.retries, label=f"[{label}/{total}] ")
+        except Exception as e:
+            for item in batch:
+                manifest.update(item, status="failed", error=str(e)[:400])
+            raise
+        for item, target in zip(batch, targets):
+            manifest.update(item, status="done", sha256=file_sha256(target), error=None)
+            if cache:
+                cache.store(cache_keys[item["index"]], target)
+            gallery.image_done(item["index"] - 1)  # Manifest indices are 1-based
+
+    # Each worker writes its images as soon as they arrive; the numbered filenames keep order.
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+            futures = [pool.submit(generate, batch) for batch in batches]
+            wait(futures, return_when=FIRST_EXCEPTION)
+            for future in futures:
+                if future.done() and future.exception():
+                    # Stop queued work; requests already in flight finish before we exit.
+                    # The manifest keeps their state, so --resume picks up from here.
+                    pool.shutdown(cancel_futures=True)
+                    raise future.exception()
+    finally:
+        client.close()
+        gallery.close()
+    items = [{"prompt": item["prompt"], "file": item["file"]} for item in manifest.items]
 
     (out_dir / "prompts.json").write_text(json.dumps(items, indent=2), encoding="utf-8")
-    write_gallery(out_dir, items)
     print(f"\nWrote: {(out_dir / 'index.html').as_posix()}")
     return 0
 
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Shared keep-alive HTTP client for gen.py.
+
+Connections are pooled per (scheme, host, port) and reused across the generation POSTs
+and image downloads, with at most `max_per_host` in flight per host. When httpx with
+HTTP/2 support is installed it is used instead (one multiplexed connection per host);
+otherwise this falls back to a stdlib http.client pool speaking HTTP/1.1 keep-alive.
+(httpx caps connections per client rather than per host; gen.py talks to one API host.)
+
+Both honour HTTP_PROXY / HTTPS_PROXY / NO_PROXY the way urllib does: https goes through
+a CONNECT tunnel, http sends absolute URLs to the proxy.
+"""
+
+from __future__ import annotations
+
+import base64
+import http.client
+import select
+import ssl
+import threading
+import urllib.request
+from urllib.parse import unquote, urlsplit
+
+try:
+    import h2  # noqa: F401  (httpx needs it for http2=True)
+    import httpx
+except ImportError:  # Optional; the stdlib pool covers everything.
+    httpx = None
+
+DEFAULT_MAX_PER_HOST = 8
+DEFAULT_TIMEOUT = 300.0
+
+# Errors meaning a reused idle connection was closed by the server; the request is retried
+# once on a new connection when its method is IDEMPOTENT.
+_STALE_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+IDEMPOTENT = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+def _dropped(conn: http.client.HTTPConnection) -> bool:
+    """True if an idle keep-alive connection was closed (or sent something unexpected)."""
+    if conn.sock is None:
+        return True
+    try:
+        readable, _, _ = select.select([conn.sock], [], [], 0)
+    except (OSError, ValueError):
+        return True
+    return bool(readable)
+
+
+class PooledResponse:
+    """File-like response; the connection goes back to the pool once the body is read."""
+
+    def __init__(self, pool: "ConnectionPool", key: tuple, conn: http.client.HTTPConnection, resp):
+        self._pool = pool
+        self._key = key
+        self._conn = conn
+        self._resp = resp
+        self.status = resp.status
+        self.reason = resp.reason
+
+    def getheader(self, name: str, default: str | None = None) -> str | None:
+        return self._resp.getheader(name, default)
+
+    def read(self, amt: int | None = None) -> bytes:
+        return self._resp.read(amt)
+
+    def close(self) -> None:
+        if self._conn is None:
+            return
+        conn, self._conn = self._conn, None
+        reusable = self._resp.isclosed() and not self._resp.will_close
+        self._resp.close()
+        self._pool._release(self._key, conn, reusable)
+
+    def __enter__(self) -> "PooledResponse":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class ConnectionPool:
+    """HTTP/1.1 keep-alive pool over http.client, safe to share between threads."""
+
+    http_version = "HTTP/1.1"
+
+    def __init__(
+        self,
+        max_per_host: int = DEFAULT_MAX_PER_HOST,
+        timeout: float = DEFAULT_TIMEOUT,
+        ssl_context: ssl.SSLContext | None = None,
+    ):
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._idle: dict[tuple, list[http.client.HTTPConnection]] = {}
+        self._slots: dict[tuple, threading.BoundedSemaphore] = {}
+        self._ssl_context = ssl_context or ssl.create_default_context()
+        self._proxies = urllib.request.getproxies()
+
+    def _proxy(self, scheme: str, host: str):
+        """(host, port, headers) of the proxy for `scheme`://`host`, or None to connect directly."""
+        proxy = self._proxies.get(scheme)
+        if not proxy or urllib.request.proxy_bypass(host):
+            return None
+        parts = urlsplit(proxy if "://" in proxy else f"http://{proxy}")
+        headers = ()
+        if parts.username:
+            credentials = f"{unquote(parts.username)}:{unquote(parts.password or '')}"
+            headers = (("Proxy-Authorization", "Basic " + base64.b64encode(credentials.encode()).decode("ascii")),)
+        return parts.hostname, parts.port or (443 if parts.scheme == "https" else 80), headers
+
+    def _connect(self, key: tuple) -> http.client.HTTPConnection:
+        scheme, host, port, proxy = key
+        if proxy is not None:
+            proxy_host, proxy_port, proxy_headers = proxy
+            if scheme == "https":
+                conn = http.client.HTTPSConnection(
+                    proxy_host, proxy_port, timeout=self.timeout, context=self._ssl_context
+                )
+                conn.set_tunnel(host, port, headers=dict(proxy_headers))
+                return conn
+            return http.client.HTTPConnection(proxy_host, proxy_port, timeout=self.timeout)
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=self.timeout, context=self._ssl_context)
+        return http.client.HTTPConnection(host, port, timeout=self.timeout)
+
+    def request(self, method: str, url: str, body: bytes | None = None, headers: dict | None = None) -> PooledResponse:
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported URL scheme: {url}")
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        proxy = self._proxy(parts.scheme, parts.hostname)
+        key = (parts.scheme, parts.hostname, port, proxy)
+        headers = dict(headers or {})
+        if proxy is not None and parts.scheme == "http":
+            # Plain http goes to the proxy as an absolute URL; https tunnels via CONNECT.
+            path = url.split("#", 1)[0]
+            headers.update(proxy[2])
+        else:
+            path = parts.path or "/"
+            if parts.query:
+                path = f"{path}?{parts.query}"
+
+        with self._lock:
+            slots = self._slots.setdefault(key, threading.BoundedSemaphore(self.max_per_host))
+        slots.acquire()
+        try:
+            while True:
+                with self._lock:
+                    idle = self._idle.get(key)
+                    conn = idle.pop() if idle else None
+                reused = conn is not None
+                if reused and _dropped(conn):
+                    conn.close()
+                    continue
+                if conn is None:
+                    conn = self._connect(key)
+                try:
+                    conn.request(method, path, body=body, headers=headers)
+                    resp = conn.getresponse()
+                except _STALE_ERRORS:
+                    conn.close()
+                    # The request may have reached the server; only resend it when doing so twice
+                    # is harmless. Idle connections the server already closed were caught above.
+                    if reused and method in IDEMPOTENT:
+                        continue
+                    raise
+                except BaseException:
+                    conn.close()
+                    raise
+                return PooledResponse(self, key, conn, resp)
+        except BaseException:
+            slots.release()
+            raise
+
+    def _release(self, key: tuple, conn: http.client.HTTPConnection, reusable: bool) -> None:
+        if reusable:
+            with self._lock:
+                self._idle.setdefault(key, []).append(conn)
+        else:
+            conn.close()
+        self._slots[key].release()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+
+class _HttpxResponse:
+    def __init__(self, resp):
+        self._resp = resp
+        self._chunks = resp.iter_bytes()
+        self._buffer = b""
+        self.status = resp.status_code
+        self.reason = resp.reason_phrase
+
+    def getheader(self, name: str, default: str | None = None) -> str | None:
+        return self._resp.headers.get(name, default)
+
+    def read(self, amt: int | None = None) -> bytes:
+        try:
+            if amt is None:
+                data = self._buffer + b"".join(self._chunks)
+                self._buffer = b""
+                return data
+            while len(self._buffer) < amt:
+                chunk = next(self._chunks, b"")
+                if not chunk:
+                    break
+                self._buffer += chunk
+        except httpx.TransportError as e:
+            raise OSError(str(e)) from e
+        data, self._buffer = self._buffer[:amt], self._buffer[amt:]
+        return data
+
+    def close(self) -> None:
+        self._resp.close()
+
+    def __enter__(self) -> "_HttpxResponse":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class HttpxPool:
+    """Same interface as ConnectionPool, backed by an httpx client with HTTP/2 enabled."""
+
+    http_version = "HTTP/2"
+
+    def __init__(
+        self,
+        max_per_host: int = DEFAULT_MAX_PER_HOST,
+        timeout: float = DEFAULT_TIMEOUT,
+        ssl_context: ssl.SSLContext | None = None,
+    ):
+        self._client = httpx.Client(
+            http2=True,
+            timeout=timeout,
+            verify=ssl_context or True,
+            limits=httpx.Limits(max_connections=max_per_host, max_keepalive_connections=max_per_host),
+        )
+
+    def request(self, method: str, url: str, body: bytes | None = None, headers: dict | None = None) -> _HttpxResponse:
+        try:
+            req = self._client.build_request(method, url, content=body, headers=headers)
+            return _HttpxResponse(self._client.send(req, stream=True))
+        except httpx.TransportError as e:
+            raise OSError(str(e)) from e
+
+    def close(self) -> None:
+        self._client.close()
+
+
+def make_pool(
+    max_per_host: int = DEFAULT_MAX_PER_HOST,
+    timeout: float = DEFAULT_TIMEOUT,
+    http2: bool = True,
+    ssl_context: ssl.SSLContext | None = None,
+):
+    """HTTP/2 pool when httpx[http2] is installed (and wanted), else the stdlib keep-alive pool."""
+    if http2 and httpx is not None:
+        return HttpxPool(max_per_host, timeout, ssl_context)
+    return ConnectionPool(max_per_host, timeout, ssl_context)
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Incremental reader for Images API responses.
+
+`b64_json` values are decoded in chunks straight into their output files while the
+response is still arriving, so a multi-megabyte image never sits in memory as JSON text,
+a Python str and decoded bytes at once. Everything else is kept as a small "skeleton"
+document in which each `b64_json` value is replaced by its image index.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import os
+import re
+from pathlib import Path
+from typing import IO
+
+CHUNK_SIZE = 64 * 1024
+
+_B64_ALPHABET = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/="
+_NOT_B64 = bytes(set(range(256)) - set(_B64_ALPHABET))
+_SPECIAL = re.compile(rb'[\\"]')
+_KEY_GAP = re.compile(rb"\s*(?::\s*)?")
+
+
+def temp_path(path: Path) -> Path:
+    return path.with_name(f".{path.name}.part")
+
+
+class ImageResponseParser:
+    """Push parser: feed() response bytes, then close() for the skeleton dict."""
+
+    def __init__(self, targets: list[Path]):
+        self.targets = targets
+        self.skeleton = bytearray()
+        self.written: list[Path] = []
+        self._state = "json"
+        self._escape = False
+        self._key = bytearray()
+        self._after_key = False
+        self._gap = bytearray()
+        self._out: IO[bytes] | None = None
+        self._pending = b""
+
+    def feed(self, chunk: bytes) -> None:
+        pos = 0
+        while pos < len(chunk):
+            if self._state == "b64":
+                pos = self._feed_b64(chunk, pos)
+            elif self._state == "string":
+                pos = self._feed_string(chunk, pos)
+            else:
+                pos = self._feed_json(chunk, pos)
+
+    def _feed_json(self, chunk: bytes, pos: int) -> int:
+        quote = chunk.find(b'"', pos)
+        end = len(chunk) if quote < 0 else quote
+        segment = chunk[pos:end]
+        self.skeleton += segment
+        if self._after_key:
+            # Only whitespace and the ':' may sit between "b64_json" and its value.
+            self._gap += segment
+            if not _KEY_GAP.fullmatch(self._gap):
+                self._after_key = False
+        if quote < 0:
+            return len(chunk)
+        if self._after_key and b":" in self._gap:
+            self._after_key = False
+            self._start_image()
+        else:
+            self._after_key = False
+            self.skeleton += b'"'
+            self._state = "string"
+            self._key = bytearray()
+        return quote + 1
+
+    def _feed_string(self, chunk: bytes, pos: int) -> int:
+        if self._escape:
+            self._escape = False
+            self.skeleton += chunk[pos : pos + 1]
+            self._key += b"?"
+            return pos + 1
+        match = _SPECIAL.search(chunk, pos)
+        end = len(chunk) if match is None else match.start()
+        self.skeleton += chunk[pos:end]
+        if len(self._key) <= 8:
+            self._key += chunk[pos : min(end, pos + 9)]
+        if match is None:
+            return len(chunk)
+        self.skeleton += chunk[end : end + 1]
+        if chunk[end] == ord("\\"):
+            self._escape = True
+            self._key += b"?"
+            return end + 1
+        self._state = "json"
+        if self._key == b"b64_json":
+            self._after_key = True
+            self._gap = bytearray()
+        return end + 1
+
+    def _start_image(self) -> None:
+        index = len(self.written)
+        if index >= len(self.targets):
+            raise RuntimeError(f"Response contains more than the {len(self.targets)} requested images.")
+        target = self.targets[index]
+        self.written.append(target)
+        self._out = open(temp_path(target), "wb")
+        self._pending = b""
+        self._state = "b64"
+
+    def _feed_b64(self, chunk: bytes, pos: int) -> int:
+        quote = chunk.find(b'"', pos)
+        end = len(chunk) if quote < 0 else quote
+        data = self._pending + chunk[pos:end]
+        if quote < 0 and data.endswith(b"\\"):
+            # Keep a split escape sequence for the next chunk.
+            data, carry = data[:-1], b"\\"
+        else:
+            carry = b""
+        # JSON may escape '/' as '\/' or wrap lines with '\n'; drop everything outside the alphabet.
+        data = data.replace(b"\\n", b"").replace(b"\\r", b"").translate(None, _NOT_B64)
+        if quote < 0:
+            usable = len(data) - len(data) % 4
+            self._out.write(base64.b64decode(data[:usable]))
+            self._pending = data[usable:] + carry
+            return len(chunk)
+        self._out.write(base64.b64decode(data))
+        self._out.close()
+        self._out = None
+        self.skeleton += str(len(self.written) - 1).encode("ascii")
+        self._state = "json"
+        return quote + 1
+
+    def close(self) -> dict:
+        if self._state != "json":
+            self.abort()
+            raise RuntimeError("Truncated Images API response.")
+        try:
+            result = json.loads(self.skeleton.decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            self.abort()
+            raise RuntimeError(f"Failed to parse Images API response: {e}") from e
+        for target in self.written:
+            os.replace(temp_path(target), target)
+        return result
+
+    def abort(self) -> None:
+        if self._out is not None:
+            self._out.close()
+            self._out = None
+        for target in self.written:
+            try:
+                os.unlink(temp_path(target))
+            except OSError:
+                pass
+
+
+def read_images_response(resp, targets: list[Path]) -> dict:
+    """
+    Parse a streamed response, writing the k-th b64_json image to targets[k]. Returns the
+    response JSON with each b64_json replaced by its index into `targets`.
+    """
+    parser = ImageResponseParser(targets)
+    try:
+        while True:
+            chunk = resp.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            parser.feed(chunk)
+    except BaseException:
+        parser.abort()
+        raise
+    return parser.close()
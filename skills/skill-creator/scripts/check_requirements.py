@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Skill eligibility on this host - which skills' requirements are met
+
+Usage:
+    python check_requirements.py <skills_root>
+    python check_requirements.py <skills_root> --versions --format json --output matrix.json
+
+Reads every skill's `metadata.openclaw` block from the skill catalog (skill_index.py)
+and applies the same rules as the gateway: `os` must include this platform, `always`
+skips the rest, every `requires.bins` and at least one of `requires.anyBins` must be on
+PATH, and every `requires.env` must be set. `requires.config` refers to OpenClaw's
+config and is reported as unchecked.
+
+PATH is scanned once into a table of executables, cached under the key of PATH plus
+the mtime of each of its directories (adding or removing a binary changes it). With
+--versions, `<bin> --version` runs for every required binary in parallel, cached by
+the binary's path, mtime and size.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from skill_index import SkillIndex
+
+CACHE_VERSION = 1
+VERSION_TIMEOUT = 5
+VERSION_WORKERS = 8
+
+
+def default_cache_path():
+    cache_home = os.environ.get("XDG_CACHE_HOME")
+    base = Path(cache_home).expanduser() if cache_home else Path.home() / ".cache"
+    return base / "openclaw" / "skill-creator" / "requirements.json"
+
+
+def path_dirs(path_env):
+    seen = []
+    for entry in path_env.split(os.pathsep):
+        if entry and entry not in seen:
+            seen.append(entry)
+    return seen
+
+
+def path_key(path_env):
+    """Changes whenever PATH or the contents of any directory on it change"""
+    digest = hashlib.sha256()
+    for directory in path_dirs(path_env):
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            mtime = -1
+        digest.update(f"{directory}\0{mtime}\0".encode("utf-8", errors="surrogateescape"))
+    return digest.hexdigest()
+
+
+def scan_path(path_env):
+    """{name: full path} for every executable on PATH; the first directory wins"""
+    executables = {}
+    for directory in path_dirs(path_env):
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.name in executables:
+                continue
+            try:
+                if entry.is_file() and os.access(entry.path, os.X_OK):
+                    executables[entry.name] = entry.path
+            except OSError:
+                continue
+    return executables
+
+
+def _binary_id(path):
+    st = os.stat(path)
+    return f"{path}\0{st.st_mtime_ns}\0{st.st_size}"
+
+
+def probe_version(path):
+    """First line of `<path> --version`, or "" when it fails or says nothing"""
+    try:
+        result = subprocess.run(
+            [path, "--version"],
+            stdin=subprocess.DEVNULL,
+            capture_output=True,
+            text=True,
+            errors="replace",
+            timeout=VERSION_TIMEOUT,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return ""
+    for line in (result.stdout + "\n" + result.stderr).splitlines():
+        if line.strip():
+            return line.strip()
+    return ""
+
+
+class ProbeCache:
+    """PATH scan and version results, in one JSON file"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            data = {}
+        if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+            data = {}
+        self.path_key = data.get("pathKey")
+        self.executables = data.get("executables", {})
+        self.versions = data.get("versions", {})
+        self._dirty = False
+        self.path_hit = False
+
+    def executables_for(self, path_env):
+        key = path_key(path_env)
+        if key == self.path_key:
+            self.path_hit = True
+            return self.executables
+        self.path_key = key
+        self.executables = scan_path(path_env)
+        self._dirty = True
+        return self.executables
+
+    def versions_for(self, paths):
+        ids = {}
+        for path in paths:
+            try:
+                ids[path] = _binary_id(path)
+            except OSError:
+                continue
+        missing = [path for path, binary_id in ids.items() if binary_id not in self.versions]
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(VERSION_WORKERS, len(missing))) as pool:
+                for path, version in zip(missing, pool.map(probe_version, missing)):
+                    self.versions[ids[path]] = version
+            # Drop entries for binaries that were replaced or removed.
+            current = set(ids.values())
+            self.versions = {key: value for key, value in self.versions.items() if key in current}
+            self._dirty = True
+        return {path: self.versions[binary_id] for path, binary_id in ids.items()}
+
+    def save(self):
+        if not self._dirty:
+            return
+        data = {
+            "version": CACHE_VERSION,
+            "pathKey": self.path_key,
+            "executables": self.executables,
+            "versions": self.versions,
+        }
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.part")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError:
+            tmp.unlink(missing_ok=True)
+
+
+def evaluate(record, executables, platform, environ):
+    """Eligibility of one catalog record, with what is missing"""
+    requires = record.get("requires") or {}
+    os_list = record.get("os") or []
+    missing = {"os": [], "bins": [], "anyBins": [], "env": []}
+    unchecked = list(requires.get("config") or [])
+
+    if os_list and platform not in os_list:
+        missing["os"] = os_list
+    elif not record.get("always"):
+        missing["bins"] = [name for name in requires.get("bins") or [] if name not in executables]
+        any_bins = requires.get("anyBins") or []
+        if any_bins and not any(name in executables for name in any_bins):
+            missing["anyBins"] = any_bins
+        missing["env"] = [name for name in requires.get("env") or [] if not environ.get(name)]
+
+    entry = {
+        "name": record["name"],
+        "path": record["path"],
+        "eligible": not record.get("error") and not any(missing.values()),
+        "missing": {key: value for key, value in missing.items() if value},
+        "bins": {
+            name: executables.get(name)
+            for name in (requires.get("bins") or []) + (requires.get("anyBins") or [])
+        },
+    }
+    if unchecked:
+        entry["unchecked"] = {"config": unchecked}
+    if record.get("error"):
+        entry["error"] = record["error"]
+    return entry
+
+
+def build_matrix(records, cache, versions=False, platform=None, environ=None):
+    platform = platform or sys.platform
+    environ = os.environ if environ is None else environ
+    executables = cache.executables_for(environ.get("PATH", os.defpath))
+    skills = [evaluate(record, executables, platform, environ) for record in records]
+    if versions:
+        found = sorted({path for skill in skills for path in skill["bins"].values() if path})
+        by_path = cache.versions_for(found)
+        for skill in skills:
+            skill["versions"] = {
+                name: by_path.get(path, "") for name, path in skill["bins"].items() if path
+            }
+    cache.save()
+    return {
+        "platform": platform,
+        "pathCached": cache.path_hit,
+        "eligible": sum(1 for skill in skills if skill["eligible"]),
+        "total": len(skills),
+        "skills": skills,
+    }
+
+
+def text_report(matrix):
+    lines = []
+    for skill in matrix["skills"]:
+        if skill["eligible"]:
+            lines.append(f"[OK] {skill['name']}")
+            continue
+        reasons = [f"{key}: {', '.join(values)}" for key, values in skill["missing"].items()]
+        if skill.get("error"):
+            reasons.append(skill["error"].splitlines()[0])
+        lines.append(f"[--] {skill['name']} (missing {'; '.join(reasons)})")
+    lines.append(f"\n{matrix['eligible']} of {matrix['total']} skill(s) eligible on {matrix['platform']}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check which skills' requirements are met on this host.")
+    parser.add_argument("skills_root", help="Directory containing the skills")
+    parser.add_argument("--index", help="Skill catalog file (see skill_index.py)")
+    parser.add_argument("--versions", action="store_true", help="Record `--version` output of required binaries")
+    parser.add_argument("--no-cache", action="store_true", help="Rescan PATH and re-run version probes")
+    parser.add_argument("--format", choices=("text", "json"), default="text", help="Report format (default: text)")
+    parser.add_argument("--output", "-o", help="Write the report to this file instead of stdout")
+    args = parser.parse_args()
+
+    if not Path(args.skills_root).is_dir():
+        print(f"[ERROR] Not a directory: {args.skills_root}")
+        sys.exit(1)
+
+    index = SkillIndex(args.skills_root, args.index)
+    try:
+        index.refresh()
+        records = index.all()
+    finally:
+        index.close()
+
+    cache = ProbeCache(default_cache_path())
+    if args.no_cache:
+        cache.path_key = None
+        cache.versions = {}
+    matrix = build_matrix(records, cache, versions=args.versions)
+
+    report = json.dumps(matrix, indent=2) if args.format == "json" else text_report(matrix)
+    if args.output:
+        Path(args.output).write_text(report + "\n", encoding="utf-8")
+        print(f"Report written to: {args.output}")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+SKILL.md frontmatter reading for quick_validate.py
+
+Only the start of the file is read, up to the closing --- line. Frontmatter made of
+plain `key: value` lines plus a JSON-style `metadata:` block (the shape every skill in
+this repo uses) is parsed directly; anything else goes to PyYAML, using the libyaml
+CSafeLoader when it is available.
+
+Usage:
+    python frontmatter.py --check <skills_root>
+
+--check parses every SKILL.md under the root both ways and reports any difference
+from yaml.safe_load on the full file, also with the file's line endings made CRLF.
+"""
+
+import io
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+
+class FrontmatterError(ValueError):
+    """The frontmatter is not valid YAML"""
+
+
+_KEY_LINE = re.compile(r"([A-Za-z_][\w-]*):(?: +(.*?))? *")
+# A double-quoted string or a comma with no value before it (both kept), or a
+# trailing comma before } or ] (dropped).
+_TRAILING_COMMA = re.compile(r'("(?:[^"\\]|\\.)*"|[\[{,]\s*,)|,(\s*[}\]])')
+# Characters that give a plain YAML scalar a special meaning, or start a number,
+# timestamp, null (~), merge (<<) or value (=) tag when they come first.
+_SPECIAL_FIRST = set("-?:,[]{}#&*!|>'\"%@`") | set("+.0123456789~=<")
+_IMPLICIT_WORDS = {"true", "false", "yes", "no", "on", "off", "null"}
+_BOOLEANS = {"true": True, "false": False}
+# A letter no YAML number or timestamp can contain, making "1password" a plain string.
+_NOT_NUMERIC = re.compile(r"[g-su-wyG-SU-WY]")
+# The frontmatter block of a SKILL.md with LF line endings.
+FRONTMATTER_PATTERN = re.compile(r"^---\n(.*?)\n---", re.DOTALL)
+
+
+def normalize_newlines(data):
+    """`data` (bytes) with CRLF and lone CR line endings turned into LF, as read_text() does"""
+    return data.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+
+
+def split_frontmatter(content):
+    """The text between the --- lines of a SKILL.md's text (any line endings), or None"""
+    match = FRONTMATTER_PATTERN.match(content.replace("\r\n", "\n").replace("\r", "\n"))
+    return match.group(1) if match else None
+
+
+def read_header(path):
+    """
+    The bytes of `path` from the start through the closing --- line: everything that
+    decides the frontmatter. The whole file only when there is no closing line, and
+    just the first line when the file does not open with ---. Line endings are
+    normalized, so a CRLF file reads (and digests) the same as its LF twin.
+    """
+    with open(path, "rb") as handle:
+        return _read_header(handle)
+
+
+def _read_header(handle):
+    lines = []
+    first = handle.readline()
+    lines.append(first)
+    if not first.startswith(b"---"):
+        return normalize_newlines(first)
+    # Same rule as FRONTMATTER_PATTERN: the closing line is the first one
+    # after the line following the opener that starts with ---.
+    lines.append(handle.readline())
+    for line in handle:
+        lines.append(line)
+        if line.startswith(b"---"):
+            break
+    return normalize_newlines(b"".join(lines))
+
+
+def _plain_scalar(value):
+    """`value` as a string if YAML would read it as one; None when unsure"""
+    if value.startswith('"'):
+        inner = value[1:-1]
+        if len(value) >= 2 and value.endswith('"') and '"' not in inner and "\\" not in inner:
+            return inner
+        return None
+    if value.startswith("'"):
+        inner = value[1:-1]
+        if len(value) >= 2 and value.endswith("'") and "'" not in inner.replace("''", ""):
+            return inner.replace("''", "'")
+        return None
+    if value[0].isdigit():
+        if not _NOT_NUMERIC.search(value):
+            return None
+    elif value[0] in _SPECIAL_FIRST or value.lower() in _IMPLICIT_WORDS:
+        return None
+    if ": " in value or " #" in value or value.endswith(":"):
+        return None
+    return value
+
+
+def _has_float(value):
+    if isinstance(value, float):
+        return True
+    if isinstance(value, dict):
+        return any(_has_float(item) for item in value.values())
+    if isinstance(value, list):
+        return any(_has_float(item) for item in value)
+    return False
+
+
+def _json_block(text):
+    """A JSON-style flow block (trailing commas allowed) if YAML would read it the same way"""
+    text = text.strip()
+    # Escapes (YAML keeps lone surrogates, JSON pairs them) and floats (YAML 1.1 reads
+    # 1e5 as a string) are where the two disagree; leave those to YAML.
+    if not text.startswith(("{", "[")) or "\\" in text:
+        return None
+    try:
+        value = json.loads(_TRAILING_COMMA.sub(lambda m: m.group(1) or m.group(2), text))
+    except ValueError:
+        return None
+    return None if _has_float(value) else value
+
+
+def parse_simple(text):
+    """
+    Parse frontmatter made only of `key: plain value` lines and `key:` followed by an
+    indented JSON-style block. Returns None for anything else, so YAML can decide.
+    """
+    if "\t" in text:  # YAML's tab rules are subtle; not worth mirroring
+        return None
+    lines = text.split("\n")
+    result = {}
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if not line.strip():
+            i += 1
+            continue
+        match = _KEY_LINE.fullmatch(line)
+        if not match or match.group(1).lower() in _IMPLICIT_WORDS or match.group(1) in result:
+            return None
+        key, value = match.groups()
+        end = i + 1
+        while end < len(lines) and (lines[end].startswith(" ") or not lines[end].strip()):
+            end += 1
+        block = "\n".join(lines[i + 1 : end])
+        if value and block.strip():
+            parsed = None
+        elif value in _BOOLEANS:
+            parsed = _BOOLEANS[value]
+        elif value:
+            parsed = _json_block(value) if value[0] in "[{" else _plain_scalar(value)
+        else:
+            parsed = _json_block(block)
+        if parsed is None:
+            return None
+        result[key] = parsed
+        i = end
+    return result or None
+
+
+def load_yaml(text):
+    import yaml
+
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    try:
+        return yaml.load(text, Loader=loader)
+    except yaml.YAMLError as e:
+        raise FrontmatterError(str(e)) from e
+
+
+def parse_frontmatter(text):
+    """The frontmatter text (between the --- lines) as Python data; raises FrontmatterError"""
+    parsed = parse_simple(text)
+    if parsed is not None:
+        return parsed
+    return load_yaml(text)
+
+
+def check(root):
+    """Compare the fast path with yaml.safe_load for every SKILL.md under `root`"""
+    import yaml
+
+    paths = sorted(p for p in Path(root).rglob("SKILL.md") if "node_modules" not in p.parts)
+    mismatches = 0
+    fast = 0
+    fast_time = slow_time = 0.0
+
+    def fast_parse(header):
+        text = split_frontmatter(header.decode())
+        if text is None:
+            return None, False
+        simple = parse_simple(text)
+        try:
+            return (simple if simple is not None else load_yaml(text)), simple is not None
+        except FrontmatterError as e:
+            return f"error: {type(e.__cause__).__name__}", False
+
+    for path in paths:
+        # Both sides start from the same bytes, with the same decoding and line endings.
+        data = normalize_newlines(path.read_bytes())
+        start = time.perf_counter()
+        text = split_frontmatter(data.decode())
+        expected = None
+        if text is not None:
+            try:
+                expected = yaml.safe_load(text)
+            except yaml.YAMLError as e:
+                expected = f"error: {type(e).__name__}"
+        slow_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual, simple = fast_parse(read_header(path))
+        fast += simple
+        fast_time += time.perf_counter() - start
+
+        if actual != expected:
+            mismatches += 1
+            print(f"[ERROR] {path}: fast path gives {actual!r}, yaml.safe_load gives {expected!r}")
+            continue
+        # The same file saved with CRLF line endings must read the same.
+        crlf = data.replace(b"\n", b"\r\n")
+        actual, _ = fast_parse(_read_header(io.BytesIO(crlf)))
+        if actual != expected:
+            mismatches += 1
+            print(f"[ERROR] {path} (CRLF): fast path gives {actual!r}, yaml.safe_load gives {expected!r}")
+    print(
+        f"{len(paths)} SKILL.md file(s), {fast} parsed without YAML, {mismatches} mismatch(es); "
+        f"{fast_time * 1000:.1f} ms vs {slow_time * 1000:.1f} ms with yaml.safe_load"
+    )
+    return mismatches == 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != "--check":
+        print("Usage: python frontmatter.py --check <skills_root>")
+        sys.exit(1)
+    sys.exit(0 if check(sys.argv[2]) else 1)
@@ -3,27 +3,388 @@
 Skill Packager - Creates a distributable .skill file of a skill folder
 
 Usage:
-    python utils/package_skill.py <path/to/skill-folder> [output-directory]
+    python utils/package_skill.py <path/to/skill-folder> [output-directory] [--compresslevel N] [--jobs N] [--quiet] [--force]
 
 Example:
     python utils/package_skill.py skills/public/my-skill
     python utils/package_skill.py skills/public/my-skill ./dist
+    python utils/package_skill.py skills/public/my-skill ./dist --compresslevel 9 --quiet
+    python utils/package_skill.py skills/public/my-skill ./dist --force
+
+Members are compressed in parallel worker processes and then written into the archive
+in order. Files that are already compressed (images, audio, video, archives, model
+weights) are stored as-is instead of being deflated again.
+
+Archives are reproducible: entries are sorted, timestamps are fixed (SOURCE_DATE_EPOCH
+if set, else 1980-01-01) and permissions normalized to 0644/0755, so the same inputs
+always give the same bytes. A <name>.skill.json manifest next to the archive records
+each file's sha256 and the archive's digest; when nothing changed, the rebuild is
+skipped (--force rebuilds anyway).
 """
 
+import argparse
+import hashlib
+import io
+import json
+import os
+import struct
 import sys
-import zipfile
+import tempfile
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 
-from quick_validate import validate_skill
+from quick_validate import open_cache, validate_skill
+
+DEFAULT_COMPRESSLEVEL = 6
+# Bump when the archive layout changes, so existing manifests stop matching.
+ARCHIVE_FORMAT = 1
+DOS_EPOCH = 315532800  # 1980-01-01T00:00:00Z, the earliest zip timestamp
+FILE_MODE = 0o100644
+EXEC_MODE = 0o100755
+EXCLUDED_DIRS = frozenset({"__pycache__", ".git"})
+EXCLUDED_FILES = frozenset({".DS_Store"})
+EXCLUDED_SUFFIXES = frozenset({".pyc", ".pyo"})
+CHUNK_SIZE = 1024 * 1024
+# Below this much data to deflate, worker start-up costs more than it saves.
+PARALLEL_MIN_BYTES = 4 * 1024 * 1024
+# Compressed members larger than this go to a spool file instead of back through the pipe.
+SPOOL_LIMIT = 8 * 1024 * 1024
+
+STORED_SUFFIXES = frozenset(
+    {
+        # images
+        ".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif", ".heic", ".ico",
+        # audio / video
+        ".mp3", ".m4a", ".aac", ".ogg", ".opus", ".flac", ".mp4", ".m4v", ".mov", ".webm", ".mkv", ".avi",
+        # archives
+        ".zip", ".gz", ".tgz", ".bz2", ".xz", ".zst", ".7z", ".rar", ".jar", ".whl", ".skill",
+        # fonts / model weights
+        ".woff", ".woff2", ".onnx", ".gguf", ".safetensors", ".pt", ".pth", ".tflite",
+    }
+)
+
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+# Same thresholds as zipfile: beyond these, the zip64 extensions carry the real values.
+ZIP64_LIMIT = (1 << 31) - 1
+ZIP_FILECOUNT_LIMIT = (1 << 16) - 1
+
+
+def _clamp32(value):
+    return value if value < ZIP64_LIMIT else 0xFFFFFFFF
+
+
+def _clamp16(value):
+    return value if value < ZIP_FILECOUNT_LIMIT else 0xFFFF
+
+
+def compress_member(path, compresslevel, store, spool_dir):
+    """
+    Read (and unless `store`, raw-deflate) one file. Runs in a worker process.
+
+    Returns (method, crc, size, compressed_size, data, spool_path): the deflated bytes are
+    in `data`, or in the file `spool_path` when large; both are None for stored members.
+    """
+    crc = 0
+    size = 0
+    if store:
+        with open(path, "rb") as handle:
+            while chunk := handle.read(CHUNK_SIZE):
+                crc = zlib.crc32(chunk, crc)
+                size += len(chunk)
+        return ZIP_STORED, crc, size, size, None, None
+
+    compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, -15)
+    out = io.BytesIO()
+    spool_path = None
+    with open(path, "rb") as handle:
+        while chunk := handle.read(CHUNK_SIZE):
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+            out.write(compressor.compress(chunk))
+            if spool_path is None and out.tell() > SPOOL_LIMIT:
+                fd, spool_path = tempfile.mkstemp(dir=spool_dir)
+                spool = os.fdopen(fd, "wb")
+                spool.write(out.getvalue())
+                out = spool
+        out.write(compressor.flush())
+    compressed_size = out.tell()
+    if spool_path is not None:
+        out.close()
+
+    if compressed_size >= size:
+        # Incompressible after all; store it rather than ship a bigger deflate stream.
+        if spool_path is not None:
+            os.unlink(spool_path)
+        return ZIP_STORED, crc, size, size, None, None
+    if spool_path is not None:
+        return ZIP_DEFLATED, crc, size, compressed_size, None, spool_path
+    return ZIP_DEFLATED, crc, size, compressed_size, out.getvalue(), None
+
+
+def archive_timestamp():
+    """Timestamp for every entry: SOURCE_DATE_EPOCH when set (reproducible-builds convention)."""
+    epoch = os.environ.get("SOURCE_DATE_EPOCH")
+    return max(int(epoch), DOS_EPOCH) if epoch else DOS_EPOCH
+
+
+def _dos_datetime(timestamp):
+    year, month, day, hour, minute, second = time.gmtime(timestamp)[:6]
+    if year < 1980:
+        year, month, day, hour, minute, second = 1980, 1, 1, 0, 0, 0
+    return (hour << 11) | (minute << 5) | (second // 2), ((year - 1980) << 9) | (month << 5) | day
+
+
+class ZipWriter:
+    """Writes members whose compression was done elsewhere, with zip64 where needed."""
+
+    def __init__(self, fp):
+        self.fp = fp
+        self.entries = []
+
+    def add(self, arcname, timestamp, mode, method, crc, size, compressed_size, write_data):
+        name = arcname.encode("utf-8")
+        flags = 0 if arcname.isascii() else 0x0800
+        dos_time, dos_date = _dos_datetime(timestamp)
+        offset = self.fp.tell()
+        zip64 = size >= ZIP64_LIMIT or compressed_size >= ZIP64_LIMIT
+        extra = struct.pack("<HHQQ", 0x0001, 16, size, compressed_size) if zip64 else b""
+        self.fp.write(
+            struct.pack(
+                "<IHHHHHIIIHH",
+                0x04034B50,
+                45 if zip64 else 20,
+                flags,
+                method,
+                dos_time,
+                dos_date,
+                crc,
+                0xFFFFFFFF if zip64 else compressed_size,
+                0xFFFFFFFF if zip64 else size,
+                len(name),
+                len(extra),
+            )
+        )
+        self.fp.write(name)
+        self.fp.write(extra)
+        write_data(self.fp)
+        self.entries.append((name, flags, method, dos_time, dos_date, crc, size, compressed_size, mode, offset))
+
+    def close(self):
+        cd_offset = self.fp.tell()
+        for name, flags, method, dos_time, dos_date, crc, size, compressed_size, mode, offset in self.entries:
+            zip64_fields = [value for value in (size, compressed_size, offset) if value >= ZIP64_LIMIT]
+            extra = b""
+            if zip64_fields:
+                extra = struct.pack(f"<HH{len(zip64_fields)}Q", 0x0001, 8 * len(zip64_fields), *zip64_fields)
+            version = 45 if zip64_fields else 20
+            self.fp.write(
+                struct.pack(
+                    "<IHHHHHHIIIHHHHHII",
+                    0x02014B50,
+                    (3 << 8) | version,  # made by: Unix
+                    version,
+                    flags,
+                    method,
+                    dos_time,
+                    dos_date,
+                    crc,
+                    _clamp32(compressed_size),
+                    _clamp32(size),
+                    len(name),
+                    len(extra),
+                    0,
+                    0,
+                    0,
+                    (mode & 0xFFFF) << 16,
+                    _clamp32(offset),
+                )
+            )
+            self.fp.write(name)
+            self.fp.write(extra)
+        cd_end = self.fp.tell()
+        cd_size = cd_end - cd_offset
+        count = len(self.entries)
+        if count >= ZIP_FILECOUNT_LIMIT or cd_size >= ZIP64_LIMIT or cd_offset >= ZIP64_LIMIT:
+            self.fp.write(struct.pack("<IQHHIIQQQQ", 0x06064B50, 44, 45, 45, 0, 0, count, count, cd_size, cd_offset))
+            self.fp.write(struct.pack("<IIQI", 0x07064B50, 0, cd_end, 1))
+        self.fp.write(
+            struct.pack(
+                "<IHHHHIIH",
+                0x06054B50,
+                0,
+                0,
+                _clamp16(count),
+                _clamp16(count),
+                _clamp32(cd_size),
+                _clamp32(cd_offset),
+                0,
+            )
+        )
+
+
+def _copy_file(path):
+    def write(fp):
+        with open(path, "rb") as handle:
+            while chunk := handle.read(CHUNK_SIZE):
+                fp.write(chunk)
+
+    return write
+
 
+def _write_bytes(data):
+    return lambda fp: fp.write(data)
 
-def package_skill(skill_path, output_dir=None):
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        while chunk := handle.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def collect_members(skill_path, exclude=()):
+    """(path, arcname, mode, size) for every file to package, sorted by arcname."""
+    exclude = {Path(path).resolve() for path in exclude}
+    members = []
+    for root, dirs, files in os.walk(skill_path):
+        dirs[:] = [name for name in dirs if name not in EXCLUDED_DIRS]
+        for name in files:
+            if name in EXCLUDED_FILES or os.path.splitext(name)[1] in EXCLUDED_SUFFIXES:
+                continue
+            file_path = Path(root) / name
+            if file_path in exclude or not file_path.is_file():
+                continue
+            st = file_path.stat()
+            mode = EXEC_MODE if st.st_mode & 0o111 else FILE_MODE
+            members.append((file_path, file_path.relative_to(skill_path.parent).as_posix(), mode, st.st_size))
+    members.sort(key=lambda member: member[1])
+    return members
+
+
+def build_manifest(skill_name, members, compresslevel, jobs=None):
+    """Per-file hashes plus one digest over everything that determines the archive bytes."""
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+        hashes = list(pool.map(file_sha256, [path for path, _, _, _ in members]))
+    files = [
+        {"path": arcname, "sha256": digest, "size": size, "mode": f"{mode & 0o777:04o}"}
+        for (_, arcname, mode, size), digest in zip(members, hashes)
+    ]
+    inputs = {
+        "format": ARCHIVE_FORMAT,
+        "compresslevel": compresslevel,
+        "timestamp": archive_timestamp(),
+        "files": files,
+    }
+    canonical = json.dumps(inputs, sort_keys=True, separators=(",", ":"))
+    return {
+        "skill": skill_name,
+        **inputs,
+        "inputsSha256": hashlib.sha256(canonical.encode("utf-8")).hexdigest(),
+    }
+
+
+def manifest_path(skill_filename):
+    return skill_filename.with_name(f"{skill_filename.name}.json")
+
+
+def part_path(path):
+    return path.with_name(f".{path.name}.part")
+
+
+def output_files(skill_filename):
+    """The archive, its manifest and their temp files; never packed, even when written inside the skill."""
+    manifest = manifest_path(skill_filename)
+    return [skill_filename, manifest, part_path(skill_filename), part_path(manifest)]
+
+
+def is_up_to_date(skill_filename, manifest):
+    """True if the existing archive was built from exactly these inputs and is intact."""
+    try:
+        previous = json.loads(manifest_path(skill_filename).read_text(encoding="utf-8"))
+        return (
+            previous.get("inputsSha256") == manifest["inputsSha256"]
+            and previous.get("archiveSha256") == file_sha256(skill_filename)
+        )
+    except (OSError, ValueError):
+        return False
+
+
+def write_manifest(skill_filename, manifest):
+    path = manifest_path(skill_filename)
+    tmp = part_path(path)
+    tmp.write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def write_archive(skill_path, skill_filename, compresslevel=DEFAULT_COMPRESSLEVEL, jobs=None, quiet=False, members=None):
+    """Zip every file under `skill_path` (as <skill-name>/...) into `skill_filename`."""
+    if members is None:
+        members = collect_members(skill_path, output_files(skill_filename))
+    timestamp = archive_timestamp()
+    deflate_bytes = 0
+    entries = []
+    for file_path, arcname, mode, size in members:
+        store = file_path.suffix.lower() in STORED_SUFFIXES or compresslevel == 0
+        if not store:
+            deflate_bytes += size
+        entries.append((file_path, arcname, mode, store))
+
+    jobs = jobs or os.cpu_count() or 1
+    tmp_filename = part_path(skill_filename)
+    with tempfile.TemporaryDirectory(prefix="package-skill-") as spool_dir:
+        args = [(path, compresslevel, store, spool_dir) for path, _, _, store in entries]
+        if jobs > 1 and deflate_bytes >= PARALLEL_MIN_BYTES:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                # map() hands back results in order while later members are still compressing.
+                results = pool.map(compress_member, *zip(*args), chunksize=4)
+                _assemble(tmp_filename, entries, results, timestamp, quiet)
+        else:
+            _assemble(tmp_filename, entries, (compress_member(*a) for a in args), timestamp, quiet)
+    os.replace(tmp_filename, skill_filename)
+
+
+def _assemble(tmp_filename, entries, results, timestamp, quiet):
+    try:
+        with open(tmp_filename, "wb") as fp:
+            writer = ZipWriter(fp)
+            for (file_path, arcname, mode, _), result in zip(entries, results):
+                method, crc, size, compressed_size, data, spool_path = result
+                if data is not None:
+                    write_data = _write_bytes(data)
+                elif spool_path is not None:
+                    write_data = _copy_file(spool_path)
+                else:
+                    write_data = _copy_file(file_path)
+                writer.add(arcname, timestamp, mode, method, crc, size, compressed_size, write_data)
+                if spool_path is not None:
+                    os.unlink(spool_path)
+                if not quiet:
+                    print(f"  Added: {arcname}")
+            writer.close()
+    except BaseException:
+        try:
+            os.unlink(tmp_filename)
+        except OSError:
+            pass
+        raise
+
+
+def package_skill(skill_path, output_dir=None, compresslevel=DEFAULT_COMPRESSLEVEL, jobs=None, quiet=False, force=False, no_cache=False):
     """
     Package a skill folder into a .skill file.
 
     Args:
         skill_path: Path to the skill folder
         output_dir: Optional output directory for the .skill file (defaults to current directory)
+        compresslevel: Deflate level 0-9 (0 stores everything)
+        jobs: Worker processes for compression (defaults to the CPU count)
+        quiet: Don't list every added file
+        force: Rebuild even if the manifest says the archive is up to date
+        no_cache: Validate from scratch instead of reusing a cached result
 
     Returns:
         Path to the created .skill file, or None if error
@@ -46,13 +407,15 @@ def package_skill(skill_path, output_dir=None):
         return None
 
     # Run validation before packaging
-    print("Validating skill...")
-    valid, message = validate_skill(skill_path)
+    if not quiet:
+        print("Validating skill...")
+    valid, message = validate_skill(skill_path, open_cache(no_cache))
     if not valid:
         print(f"[ERROR] Validation failed: {message}")
         print("   Please fix the validation errors before packaging.")
         return None
-    print(f"[OK] {message}\n")
+    if not quiet:
+        print(f"[OK] {message}\n")
 
     # Determine output location
     skill_name = skill_path.name
@@ -64,18 +427,22 @@ def package_skill(skill_path, output_dir=None):
 
     skill_filename = output_path / f"{skill_name}.skill"
 
-    # Create the .skill file (zip format)
+    # Create the .skill file (zip format), unless an identical one is already there
     try:
-        with zipfile.ZipFile(skill_filename, "w", zipfile.ZIP_DEFLATED) as zipf:
-            # Walk through the skill directory
-            for file_path in skill_path.rglob("*"):
-                if file_path.is_file():
-                    # Calculate the relative path within the zip
-                    arcname = file_path.relative_to(skill_path.parent)
-                    zipf.write(file_path, arcname)
-                    print(f"  Added: {arcname}")
+        members = collect_members(skill_path, output_files(skill_filename))
+        manifest = build_manifest(skill_name, members, compresslevel, jobs)
+        if not force and is_up_to_date(skill_filename, manifest):
+            print(f"[OK] Up to date: {skill_filename}")
+            return skill_filename
 
-        print(f"\n[OK] Successfully packaged skill to: {skill_filename}")
+        write_archive(skill_path, skill_filename, compresslevel, jobs, quiet, members)
+        manifest["archiveSha256"] = file_sha256(skill_filename)
+        manifest["archiveSize"] = skill_filename.stat().st_size
+        write_manifest(skill_filename, manifest)
+        if not quiet:
+            print()
+        print(f"[OK] Successfully packaged skill to: {skill_filename}")
+        print(f"   sha256: {manifest['archiveSha256']}")
         return skill_filename
 
     except Exception as e:
@@ -84,22 +451,33 @@ def package_skill(skill_path, output_dir=None):
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python utils/package_skill.py <path/to/skill-folder> [output-directory]")
-        print("\nExample:")
-        print("  python utils/package_skill.py skills/public/my-skill")
-        print("  python utils/package_skill.py skills/public/my-skill ./dist")
-        sys.exit(1)
-
-    skill_path = sys.argv[1]
-    output_dir = sys.argv[2] if len(sys.argv) > 2 else None
+    parser = argparse.ArgumentParser(
+        description="Package a skill folder into a distributable .skill file.",
+        epilog="Example: python utils/package_skill.py skills/public/my-skill ./dist",
+    )
+    parser.add_argument("skill_path", help="Path to the skill folder")
+    parser.add_argument("output_dir", nargs="?", help="Output directory (default: current directory)")
+    parser.add_argument(
+        "--compresslevel",
+        type=int,
+        choices=range(10),
+        metavar="0-9",
+        default=DEFAULT_COMPRESSLEVEL,
+        help=f"Deflate level; 0 stores everything (default: {DEFAULT_COMPRESSLEVEL})",
+    )
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="Compression worker processes (default: CPU count)")
+    parser.add_argument("--quiet", "-q", action="store_true", help="Only print errors and the final result")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if the archive is up to date")
+    parser.add_argument("--no-cache", action="store_true", help="Don't reuse cached validation results")
+    args = parser.parse_args()
 
-    print(f"Packaging skill: {skill_path}")
-    if output_dir:
-        print(f"   Output directory: {output_dir}")
-    print()
+    if not args.quiet:
+        print(f"Packaging skill: {args.skill_path}")
+        if args.output_dir:
+            print(f"   Output directory: {args.output_dir}")
+        print()
 
-    result = package_skill(skill_path, output_dir)
+    result = package_skill(args.skill_path, args.output_dir, args.compresslevel, args.jobs, args.quiet, args.force, args.no_cache)
 
     if result:
         sys.exit(0)
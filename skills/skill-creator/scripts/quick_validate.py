@@ -1,101 +1,335 @@
 #!/usr/bin/env python3
 """
 Quick validation script for skills - minimal version
+
+Usage:
+    python quick_validate.py <skill_directory>
+    python quick_validate.py <skill_directory> [<skill_directory> ...] [--format text|json|junit]
+    python quick_validate.py --all skills/ [--jobs N] [--format json] [--output report.json]
+
+With several skills (or --all, which finds every SKILL.md under a root), the skills are
+validated concurrently in one process, every error per skill is reported rather than
+just the first, and the report can be written as JSON or JUnit XML for CI.
+
+Only the frontmatter part of each SKILL.md is read (see frontmatter.py), with CRLF line
+endings read as LF. Results are cached by its digest and RULES_VERSION, so unchanged
+skills are not parsed again (--no-cache skips the cache).
 """
 
+import argparse
+import hashlib
+import json
+import os
 import re
 import sys
+import xml.etree.ElementTree as ET
 from pathlib import Path
 
-import yaml
+from frontmatter import FrontmatterError, parse_frontmatter, read_header, split_frontmatter
 
 MAX_SKILL_NAME_LENGTH = 64
+MAX_DESCRIPTION_LENGTH = 1024
+ALLOWED_PROPERTIES = {"name", "description", "license", "allowed-tools", "metadata"}
+# Below this many skills a worker pool costs more to start than it saves.
+PARALLEL_MIN_SKILLS = 16
+SKIP_DIRS = {"node_modules", "__pycache__"}
+# Bump whenever a check is added or changed, so cached results are not reused.
+RULES_VERSION = 2
+CACHE_MAX_ENTRIES = 4096
 
 
-def validate_skill(skill_path):
-    """Basic validation of a skill"""
-    skill_path = Path(skill_path)
+def default_cache_path():
+    cache_home = os.environ.get("XDG_CACHE_HOME")
+    base = Path(cache_home).expanduser() if cache_home else Path.home() / ".cache"
+    return base / "openclaw" / "skill-creator" / "validate.json"
 
-    skill_md = skill_path / "SKILL.md"
-    if not skill_md.exists():
-        return False, "SKILL.md not found"
 
-    content = skill_md.read_text()
-    if not content.startswith("---"):
-        return False, "No YAML frontmatter found"
+class ValidationCache:
+    """Validation results (lists of errors) in one JSON file, keyed on SKILL.md frontmatter"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        try:
+            self.entries = json.loads(self.path.read_text(encoding="utf-8"))
+            if not isinstance(self.entries, dict):
+                self.entries = {}
+        except (OSError, ValueError):
+            self.entries = {}
+
+    @staticmethod
+    def key(data):
+        return hashlib.sha256(b"rules-%d\0" % RULES_VERSION + data).hexdigest()
+
+    def get(self, key):
+        errors = self.entries.get(key)
+        if errors is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return errors
+
+    def put(self, key, errors):
+        self.entries[key] = errors
+        self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+        # Oldest entries first (dicts keep insertion order).
+        for key in list(self.entries)[: max(0, len(self.entries) - CACHE_MAX_ENTRIES)]:
+            del self.entries[key]
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.part")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(json.dumps(self.entries, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp, self.path)
+            self._dirty = False
+        except OSError:
+            # The cache is only an optimization; a read-only home just means no caching.
+            tmp.unlink(missing_ok=True)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
 
-    match = re.match(r"^---\n(.*?)\n---", content, re.DOTALL)
-    if not match:
-        return False, "Invalid frontmatter format"
 
-    frontmatter_text = match.group(1)
+def open_cache(no_cache=False):
+    return None if no_cache else ValidationCache(default_cache_path())
+
+
+def check_content(content):
+    """Every problem with a SKILL.md's text, as a list of messages (empty when valid)"""
+    if not content.startswith("---"):
+        return ["No YAML frontmatter found"]
+
+    frontmatter_text = split_frontmatter(content)
+    if frontmatter_text is None:
+        return ["Invalid frontmatter format"]
 
     try:
-        frontmatter = yaml.safe_load(frontmatter_text)
+        frontmatter = parse_frontmatter(frontmatter_text)
         if not isinstance(frontmatter, dict):
-            return False, "Frontmatter must be a YAML dictionary"
-    except yaml.YAMLError as e:
-        return False, f"Invalid YAML in frontmatter: {e}"
+            return ["Frontmatter must be a YAML dictionary"]
+    except FrontmatterError as e:
+        return [f"Invalid YAML in frontmatter: {e}"]
 
-    allowed_properties = {"name", "description", "license", "allowed-tools", "metadata"}
+    errors = []
 
-    unexpected_keys = set(frontmatter.keys()) - allowed_properties
+    unexpected_keys = set(frontmatter.keys()) - ALLOWED_PROPERTIES
     if unexpected_keys:
-        allowed = ", ".join(sorted(allowed_properties))
+        allowed = ", ".join(sorted(ALLOWED_PROPERTIES))
         unexpected = ", ".join(sorted(unexpected_keys))
-        return (
-            False,
-            f"Unexpected key(s) in SKILL.md frontmatter: {unexpected}. Allowed properties are: {allowed}",
+        errors.append(
+            f"Unexpected key(s) in SKILL.md frontmatter: {unexpected}. Allowed properties are: {allowed}"
         )
 
     if "name" not in frontmatter:
-        return False, "Missing 'name' in frontmatter"
+        errors.append("Missing 'name' in frontmatter")
     if "description" not in frontmatter:
-        return False, "Missing 'description' in frontmatter"
+        errors.append("Missing 'description' in frontmatter")
 
     name = frontmatter.get("name", "")
     if not isinstance(name, str):
-        return False, f"Name must be a string, got {type(name).__name__}"
+        errors.append(f"Name must be a string, got {type(name).__name__}")
+        name = ""
     name = name.strip()
     if name:
         if not re.match(r"^[a-z0-9-]+$", name):
-            return (
-                False,
-                f"Name '{name}' should be hyphen-case (lowercase letters, digits, and hyphens only)",
+            errors.append(
+                f"Name '{name}' should be hyphen-case (lowercase letters, digits, and hyphens only)"
             )
         if name.startswith("-") or name.endswith("-") or "--" in name:
-            return (
-                False,
-                f"Name '{name}' cannot start/end with hyphen or contain consecutive hyphens",
-            )
+            errors.append(f"Name '{name}' cannot start/end with hyphen or contain consecutive hyphens")
         if len(name) > MAX_SKILL_NAME_LENGTH:
-            return (
-                False,
+            errors.append(
                 f"Name is too long ({len(name)} characters). "
-                f"Maximum is {MAX_SKILL_NAME_LENGTH} characters.",
+                f"Maximum is {MAX_SKILL_NAME_LENGTH} characters."
             )
 
     description = frontmatter.get("description", "")
     if not isinstance(description, str):
-        return False, f"Description must be a string, got {type(description).__name__}"
+        errors.append(f"Description must be a string, got {type(description).__name__}")
+        description = ""
     description = description.strip()
     if description:
         if "<" in description or ">" in description:
-            return False, "Description cannot contain angle brackets (< or >)"
-        if len(description) > 1024:
-            return (
-                False,
-                f"Description is too long ({len(description)} characters). Maximum is 1024 characters.",
+            errors.append("Description cannot contain angle brackets (< or >)")
+        if len(description) > MAX_DESCRIPTION_LENGTH:
+            errors.append(
+                f"Description is too long ({len(description)} characters). "
+                f"Maximum is {MAX_DESCRIPTION_LENGTH} characters."
             )
 
+    return errors
+
+
+def collect_errors(skill_path, cache=None):
+    """Every problem with a skill, as a list of messages (empty when valid)"""
+    skill_md = Path(skill_path) / "SKILL.md"
+    if not skill_md.exists():
+        return ["SKILL.md not found"]
+
+    data = read_header(skill_md)
+    if cache is None:
+        return check_content(data.decode())
+    key = cache.key(data)
+    errors = cache.get(key)
+    if errors is None:
+        errors = check_content(data.decode())
+        cache.put(key, errors)
+    return errors
+
+
+def validate_skill(skill_path, cache=None):
+    """Basic validation of a skill"""
+    errors = collect_errors(skill_path, cache)
+    if cache is not None:
+        cache.save()
+    if errors:
+        return False, errors[0]
     return True, "Skill is valid!"
 
 
-if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python quick_validate.py <skill_directory>")
+def find_skills(root):
+    """Every directory under `root` that contains a SKILL.md, sorted"""
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS and not d.startswith("."))
+        if "SKILL.md" in filenames:
+            found.append(Path(dirpath))
+    return found
+
+
+def validate_many(skill_paths, jobs=None, cache=None):
+    """[(path, errors)] for every skill, in input order; only cache misses are parsed"""
+    results = [None] * len(skill_paths)
+    pending = []
+    for i, skill_path in enumerate(skill_paths):
+        skill_md = Path(skill_path) / "SKILL.md"
+        try:
+            data = read_header(skill_md)
+        except FileNotFoundError:
+            results[i] = ["SKILL.md not found"]
+            continue
+        except OSError as e:
+            results[i] = [f"Could not read SKILL.md: {e}"]
+            continue
+        key = cache.key(data) if cache is not None else None
+        if key is not None:
+            results[i] = cache.get(key)
+        if results[i] is None:
+            try:
+                pending.append((i, key, data.decode()))
+            except UnicodeDecodeError as e:
+                results[i] = [f"SKILL.md is not valid UTF-8: {e}"]
+
+    contents = [content for _, _, content in pending]
+    jobs = jobs or os.cpu_count() or 1
+    if jobs > 1 and len(contents) >= PARALLEL_MIN_SKILLS:
+        from concurrent.futures import ProcessPoolExecutor  # Only needed for large batches
+
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            chunksize = max(1, len(contents) // (jobs * 4))
+            checked = list(pool.map(check_content, contents, chunksize=chunksize))
+    else:
+        checked = [check_content(content) for content in contents]
+
+    for (i, key, _), errors in zip(pending, checked):
+        results[i] = errors
+        if cache is not None:
+            cache.put(key, errors)
+    if cache is not None:
+        cache.save()
+    return [(str(path), errors) for path, errors in zip(skill_paths, results)]
+
+
+def json_report(results, cache=None):
+    failed = sum(1 for _, errors in results if errors)
+    report = {
+        "total": len(results),
+        "failed": failed,
+        "skills": [{"path": path, "valid": not errors, "errors": errors} for path, errors in results],
+    }
+    if cache is not None:
+        report["cache"] = cache.stats()
+    return json.dumps(report, indent=2)
+
+
+def junit_report(results, cache=None):
+    failed = sum(1 for _, errors in results if errors)
+    suite = ET.Element(
+        "testsuite", name="skill-validation", tests=str(len(results)), failures=str(failed)
+    )
+    if cache is not None:
+        properties = ET.SubElement(suite, "properties")
+        for name, value in cache.stats().items():
+            ET.SubElement(properties, "property", name=f"cache.{name}", value=str(value))
+    for path, errors in results:
+        case = ET.SubElement(suite, "testcase", classname="skills", name=path)
+        if errors:
+            failure = ET.SubElement(case, "failure", message=errors[0])
+            failure.text = "\n".join(errors)
+    ET.indent(suite)
+    return '<?xml version="1.0" encoding="UTF-8"?>\n' + ET.tostring(suite, encoding="unicode")
+
+
+def text_report(results, cache=None):
+    lines = []
+    for path, errors in results:
+        if errors:
+            lines.append(f"[ERROR] {path}")
+            lines.extend(f"   - {error}" for error in errors)
+        else:
+            lines.append(f"[OK] {path}")
+    failed = sum(1 for _, errors in results if errors)
+    summary = f"\n{len(results)} skill(s) checked, {failed} failed"
+    if cache is not None:
+        summary += f" (cache: {cache.hits} hit(s), {cache.misses} miss(es))"
+    lines.append(summary)
+    return "\n".join(lines)
+
+
+REPORTS = {"text": text_report, "json": json_report, "junit": junit_report}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate skill folders.")
+    parser.add_argument("skill_paths", nargs="*", help="Skill directories to validate")
+    parser.add_argument("--all", metavar="ROOT", help="Validate every skill (SKILL.md) found under ROOT")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--format", choices=REPORTS, default="text", help="Report format (default: text)")
+    parser.add_argument("--output", "-o", help="Write the report to this file instead of stdout")
+    parser.add_argument("--no-cache", action="store_true", help="Re-check every skill, ignoring cached results")
+    args = parser.parse_args()
+
+    skill_paths = [Path(p) for p in args.skill_paths]
+    if args.all:
+        if not Path(args.all).is_dir():
+            print(f"[ERROR] Not a directory: {args.all}")
+            sys.exit(1)
+        skill_paths += find_skills(args.all)
+    if not skill_paths:
+        parser.print_usage()
         sys.exit(1)
 
-    valid, message = validate_skill(sys.argv[1])
-    print(message)
-    sys.exit(0 if valid else 1)
+    # The original single-skill form keeps its one-line output.
+    if len(skill_paths) == 1 and not args.all and args.format == "text" and not args.output:
+        valid, message = validate_skill(skill_paths[0], open_cache(args.no_cache))
+        print(message)
+        sys.exit(0 if valid else 1)
+
+    cache = open_cache(args.no_cache)
+    results = validate_many(skill_paths, args.jobs, cache)
+    report = REPORTS[args.format](results, cache)
+    if args.output:
+        Path(args.output).write_text(report + "\n", encoding="utf-8")
+        print(f"Report written to: {args.output}")
+    else:
+        print(report)
+    sys.exit(1 if any(errors for _, errors in results) else 0)
+
+
+if __name__ == "__main__":
+    main()
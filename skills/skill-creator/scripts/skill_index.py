@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Skill catalog - every skill's frontmatter compiled into one SQLite file
+
+Usage:
+    python skill_index.py <skills_root>                      # build/refresh, print a summary
+    python skill_index.py <skills_root> --list [--format json]
+    python skill_index.py <skills_root> --search "image generation"
+    python skill_index.py <skills_root> --show nano-banana-pro
+    python skill_index.py <skills_root> --index skills.sqlite --no-refresh --list
+
+Each refresh stats every SKILL.md, re-reads only those whose mtime or size changed and
+re-parses only those whose frontmatter bytes changed (see frontmatter.py), so keeping
+the catalog current costs a directory walk. Tools that read the catalog directly (one
+file open, indexed by name, full-text search over name and description when SQLite has
+FTS5) never touch the SKILL.md files.
+
+Each row holds the skill's name, description and a JSON record with the `openclaw`
+metadata flattened out: emoji, homepage, os, requires (bins, anyBins, env, config),
+install, plus the full frontmatter.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+from pathlib import Path
+
+from frontmatter import FrontmatterError, parse_frontmatter, read_header, split_frontmatter
+from quick_validate import find_skills
+
+# Bump when the schema or record layout changes; older catalogs are rebuilt.
+INDEX_VERSION = 2
+MANIFEST_KEY = "openclaw"
+REQUIRES_KEYS = ("bins", "anyBins", "env", "config")
+
+
+def default_index_path(root):
+    cache_home = os.environ.get("XDG_CACHE_HOME")
+    base = Path(cache_home).expanduser() if cache_home else Path.home() / ".cache"
+    root_id = hashlib.sha256(str(Path(root).resolve()).encode("utf-8")).hexdigest()[:16]
+    return base / "openclaw" / "skill-creator" / f"skill-index-{root_id}.sqlite"
+
+
+def _string_list(value):
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, list):
+        return [str(item) for item in value if isinstance(item, (str, int, float))]
+    return []
+
+
+def build_record(rel_path, header):
+    """The catalog record for one skill, from the start of its SKILL.md"""
+    record = {"path": rel_path, "name": Path(rel_path).name, "description": ""}
+    text = split_frontmatter(header.decode("utf-8", errors="replace"))
+    if text is None:
+        record["error"] = "No valid frontmatter found"
+        return record
+    try:
+        frontmatter = parse_frontmatter(text)
+    except FrontmatterError as e:
+        record["error"] = f"Invalid YAML in frontmatter: {e}"
+        return record
+    if not isinstance(frontmatter, dict):
+        record["error"] = "Frontmatter must be a YAML dictionary"
+        return record
+
+    metadata = frontmatter.get("metadata")
+    manifest = metadata.get(MANIFEST_KEY) if isinstance(metadata, dict) else None
+    manifest = manifest if isinstance(manifest, dict) else {}
+    requires = manifest.get("requires") if isinstance(manifest.get("requires"), dict) else {}
+    install = manifest.get("install")
+
+    if isinstance(frontmatter.get("name"), str) and frontmatter["name"].strip():
+        record["name"] = frontmatter["name"].strip()
+    if frontmatter.get("description") is not None:
+        record["description"] = str(frontmatter["description"]).strip()
+    record.update(
+        {
+            "emoji": manifest.get("emoji"),
+            "homepage": frontmatter.get("homepage") or manifest.get("homepage"),
+            "primaryEnv": manifest.get("primaryEnv"),
+            "always": bool(manifest.get("always", False)),
+            "os": _string_list(manifest.get("os")),
+            "requires": {key: _string_list(requires.get(key)) for key in REQUIRES_KEYS},
+            "install": install if isinstance(install, list) else [],
+            "frontmatter": frontmatter,
+        }
+    )
+    return record
+
+
+class SkillIndex:
+    """The catalog for one skills root, stored at `index_path`"""
+
+    def __init__(self, root, index_path=None):
+        self.root = Path(root)
+        self.path = Path(index_path) if index_path else default_index_path(root)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.fts = True
+        self._init_schema()
+
+    def _init_schema(self):
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != INDEX_VERSION:
+            with self.conn:
+                self.conn.execute("DROP TABLE IF EXISTS skills")
+                self.conn.execute("DROP TABLE IF EXISTS skills_fts")
+        with self.conn:
+            self.conn.execute(
+                """CREATE TABLE IF NOT EXISTS skills (
+                    path TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    description TEXT NOT NULL,
+                    record TEXT NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    size INTEGER NOT NULL,
+                    digest TEXT NOT NULL
+                )"""
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS skills_name ON skills (name)")
+            try:
+                self.conn.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS skills_fts USING fts5(path UNINDEXED, name, description)"
+                )
+            except sqlite3.OperationalError:  # SQLite built without FTS5; search falls back to LIKE
+                self.fts = False
+            self.conn.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+
+    def close(self):
+        self.conn.close()
+
+    def refresh(self, force=False):
+        """Bring the catalog in line with the SKILL.md files; returns counts of what changed"""
+        known = {
+            path: (mtime_ns, size, digest)
+            for path, mtime_ns, size, digest in self.conn.execute("SELECT path, mtime_ns, size, digest FROM skills")
+        }
+        stats = {"skills": 0, "parsed": 0, "touched": 0, "removed": 0}
+        with self.conn:
+            for skill_dir in find_skills(self.root):
+                rel_path = skill_dir.relative_to(self.root).as_posix()
+                skill_md = skill_dir / "SKILL.md"
+                st = skill_md.stat()
+                stats["skills"] += 1
+                previous = known.pop(rel_path, None)
+                if not force and previous and previous[:2] == (st.st_mtime_ns, st.st_size):
+                    continue
+                header = read_header(skill_md)
+                digest = hashlib.sha256(header).hexdigest()
+                if not force and previous and previous[2] == digest:
+                    self.conn.execute(
+                        "UPDATE skills SET mtime_ns = ?, size = ? WHERE path = ?",
+                        (st.st_mtime_ns, st.st_size, rel_path),
+                    )
+                    stats["touched"] += 1
+                    continue
+                self._store(build_record(rel_path, header), st, digest)
+                stats["parsed"] += 1
+            for rel_path in known:
+                self.conn.execute("DELETE FROM skills WHERE path = ?", (rel_path,))
+                if self.fts:
+                    self.conn.execute("DELETE FROM skills_fts WHERE path = ?", (rel_path,))
+                stats["removed"] += 1
+        return stats
+
+    def _store(self, record, st, digest):
+        path, name, description = record["path"], record["name"], record["description"]
+        self.conn.execute(
+            "INSERT OR REPLACE INTO skills (path, name, description, record, mtime_ns, size, digest)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (path, name, description, json.dumps(record, default=str), st.st_mtime_ns, st.st_size, digest),
+        )
+        if self.fts:
+            self.conn.execute("DELETE FROM skills_fts WHERE path = ?", (path,))
+            self.conn.execute(
+                "INSERT INTO skills_fts (path, name, description) VALUES (?, ?, ?)", (path, name, description)
+            )
+
+    def all(self):
+        return [json.loads(row[0]) for row in self.conn.execute("SELECT record FROM skills ORDER BY name")]
+
+    def get(self, name):
+        # Two skills can share a name; the first by path wins, so the answer is stable.
+        row = self.conn.execute(
+            "SELECT record FROM skills WHERE name = ? OR path = ? ORDER BY path LIMIT 1", (name, name)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def search(self, query):
+        """Skills whose name or description match every word of `query` (as prefixes), best first"""
+        words = query.split()
+        if not words:
+            return []
+        if self.fts:
+            match = " ".join('"{}"*'.format(word.replace('"', '""')) for word in words)
+            rows = self.conn.execute(
+                "SELECT s.record FROM skills_fts f JOIN skills s ON s.path = f.path"
+                " WHERE skills_fts MATCH ? ORDER BY f.rank",
+                (match,),
+            )
+        else:
+            clause = " AND ".join(["(name LIKE ? OR description LIKE ?)"] * len(words))
+            params = [f"%{word}%" for word in words for _ in range(2)]
+            rows = self.conn.execute(f"SELECT record FROM skills WHERE {clause} ORDER BY name", params)
+        return [json.loads(row[0]) for row in rows]
+
+
+def format_list(records):
+    lines = []
+    for record in records:
+        emoji = record.get("emoji") or " "
+        description = record["description"]
+        if len(description) > 72:
+            description = description[:71] + "…"
+        note = f"  [ERROR] {record['error'].splitlines()[0]}" if record.get("error") else ""
+        lines.append(f"{emoji} {record['name']:<24} {description}{note}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and query a catalog of skill frontmatter.")
+    parser.add_argument("skills_root", help="Directory containing the skills")
+    parser.add_argument("--index", help="Catalog file (default: a per-root file under ~/.cache/openclaw)")
+    parser.add_argument("--rebuild", action="store_true", help="Re-parse every SKILL.md")
+    parser.add_argument("--no-refresh", action="store_true", help="Query the catalog as it is, without checking files")
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument("--list", action="store_true", help="List every skill")
+    action.add_argument("--search", metavar="QUERY", help="Full-text search over names and descriptions")
+    action.add_argument("--show", metavar="NAME", help="Print one skill's record as JSON")
+    parser.add_argument("--format", choices=("text", "json"), default="text", help="Output for --list/--search")
+    args = parser.parse_args()
+
+    if not Path(args.skills_root).is_dir():
+        print(f"[ERROR] Not a directory: {args.skills_root}")
+        sys.exit(1)
+
+    index = SkillIndex(args.skills_root, args.index)
+    try:
+        if not args.no_refresh:
+            stats = index.refresh(force=args.rebuild)
+            if not (args.list or args.search or args.show):
+                print(
+                    f"[OK] Indexed {stats['skills']} skill(s): {stats['parsed']} parsed, "
+                    f"{stats['touched']} unchanged after touch, {stats['removed']} removed"
+                )
+                print(f"   Index: {index.path}")
+                return
+
+        if args.show:
+            record = index.get(args.show)
+            if record is None:
+                print(f"[ERROR] Skill not found: {args.show}")
+                sys.exit(1)
+            print(json.dumps(record, indent=2, ensure_ascii=False, default=str))
+            return
+
+        records = index.search(args.search) if args.search else index.all()
+        if args.format == "json":
+            print(json.dumps(records, indent=2, ensure_ascii=False, default=str))
+        else:
+            print(format_list(records))
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()